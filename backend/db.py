@@ -1,25 +1,47 @@
 # db.py
 import os
+from urllib.parse import quote_plus
+
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import declarative_base
+
+from db_engine import Database
 
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Connection settings for a PostgreSQL DATABASE_URL built from parts; DB_PORT is optional
+DB_URL_SETTINGS = ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME")
+
+
+def database_url() -> str:
+    """DATABASE_URL, else PostgreSQL from the DB_* settings; there are no defaults to fall back on."""
+    url = os.getenv("DATABASE_URL")
+    if url:
+        return url
+    missing = [name for name in DB_URL_SETTINGS if os.getenv(name) is None]
+    if missing:
+        raise RuntimeError(
+            f"Set DATABASE_URL, or all of {', '.join(DB_URL_SETTINGS)} (missing: {', '.join(missing)})"
+        )
+    return "postgresql://{}:{}@{}:{}/{}".format(
+        os.getenv("DB_USER"),
+        quote_plus(os.getenv("DB_PASSWORD")),
+        os.getenv("DB_HOST"),
+        os.getenv("DB_PORT", "5432"),
+        os.getenv("DB_NAME"),
+    )
+
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-)
+DATABASE_URL = database_url()
 
-# Session factory
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
+# Sync engine and sessions for code running in worker threads (stream ingestion, push delivery),
+# async ones for the request handlers; see db_engine.py
+database = Database(DATABASE_URL, os.getenv("ASYNC_DATABASE_URL"))
+engine, SessionLocal = database.engine, database.SessionLocal
+ASYNC_DATABASE_URL = database.async_url
+async_engine, AsyncSessionLocal = database.async_engine, database.AsyncSessionLocal
+get_db = database.get_db
+pool_stats = database.pool_stats
 
 # Base for models
 Base = declarative_base()
@@ -0,0 +1,180 @@
+"""
+Engines, connection pools and pool monitoring for one database.
+
+Shared by backend/db.py and realtime_alert_api/app/database.py, which only
+resolve their DATABASE_URL differently. The apps are deployed on their own,
+so each ships this file; backend/tests/test_db_engine.py keeps the two copies
+identical. Edit both together.
+"""
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Dict
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+# Connection pool of each engine (sync and async have one each): DB_POOL_SIZE kept open plus up to
+# DB_MAX_OVERFLOW during bursts; a checkout waits DB_POOL_TIMEOUT_S for a free connection before
+# failing, and connections are replaced after DB_POOL_RECYCLE_S (-1 keeps them)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "30"))
+DB_POOL_RECYCLE_S = int(os.getenv("DB_POOL_RECYCLE_S", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Async drivers for the request handlers: asyncpg for PostgreSQL, aiosqlite for local SQLite
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """The same database with its async driver, e.g. postgresql://... -> postgresql+asyncpg://..."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} databases; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+class PoolMonitor:
+    """
+    Counters for one engine's pool: how long checkouts take (waiting for a
+    free connection, plus pre-ping or opening a new one), checkout timeouts,
+    and connection churn (opened, closed and invalidated DBAPI connections).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._checkout_s = 0.0
+        self._max_checkout_s = 0.0
+        self._timeouts = 0
+        self._opened = 0
+        self._closed = 0
+        self._invalidated = 0
+
+    def attach(self, engine: Engine) -> None:
+        engine.pool.monitor = self
+        event.listen(engine, "connect", lambda *_: self._count("_opened"))
+        event.listen(engine, "close", lambda *_: self._count("_closed"))
+        event.listen(engine, "close_detached", lambda *_: self._count("_closed"))
+        event.listen(engine, "invalidate", lambda *_: self._count("_invalidated"))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def checked_out(self, seconds: float) -> None:
+        with self._lock:
+            self._checkouts += 1
+            self._checkout_s += seconds
+            self._max_checkout_s = max(self._max_checkout_s, seconds)
+
+    def timed_out(self) -> None:
+        self._count("_timeouts")
+
+    def stats(self, pool: Pool) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                idle=pool.checkedin(),
+                # overflow() counts up from -size, so it is only positive past pool_size
+                overflow=max(0, pool.overflow()),
+                max_overflow=pool._max_overflow,
+                timeout_s=pool.timeout(),
+            )
+        with self._lock:
+            stats.update(
+                checkouts=self._checkouts,
+                avg_checkout_ms=round(self._checkout_s / self._checkouts * 1000.0, 3) if self._checkouts else 0.0,
+                max_checkout_ms=round(self._max_checkout_s * 1000.0, 3),
+                timeouts=self._timeouts,
+                connections_opened=self._opened,
+                connections_closed=self._closed,
+                invalidated=self._invalidated,
+            )
+        return stats
+
+
+class _MonitoredPool:
+    monitor: PoolMonitor | None = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            if self.monitor is not None:
+                self.monitor.timed_out()
+            raise
+        finally:
+            if self.monitor is not None:
+                self.monitor.checked_out(time.perf_counter() - started)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting into the same monitor
+        pool = super().recreate()
+        pool.monitor = self.monitor
+        return pool
+
+
+class MonitoredQueuePool(_MonitoredPool, QueuePool):
+    pass
+
+
+class MonitoredAsyncQueuePool(_MonitoredPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(url: str, poolclass: type) -> Dict[str, Any]:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in a single connection; keep SQLAlchemy's default pool
+        return {"pool_pre_ping": DB_POOL_PRE_PING}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_S,
+        "pool_recycle": DB_POOL_RECYCLE_S,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+class Database:
+    """
+    A sync engine for code running in worker threads and an async engine for
+    the FastAPI handlers, so queries don't block the event loop, each with its
+    session factory and pool monitor. ``async_url`` defaults to ``url`` with
+    its async driver.
+    """
+
+    def __init__(self, url: str, async_url: str | None = None):
+        self.url = url
+        self.engine = create_engine(url, **_pool_options(url, MonitoredQueuePool))
+        self.engine_monitor = PoolMonitor()
+        self.engine_monitor.attach(self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        self.async_url = async_url or async_database_url(url)
+        self.async_engine = create_async_engine(self.async_url, **_pool_options(self.async_url, MonitoredAsyncQueuePool))
+        self.async_engine_monitor = PoolMonitor()
+        self.async_engine_monitor.attach(self.async_engine.sync_engine)
+        self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_db(self) -> AsyncIterator[AsyncSession]:
+        """FastAPI dependency shared by all routers: one AsyncSession per request."""
+        async with self.AsyncSessionLocal() as session:
+            yield session
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Pool occupancy and counters of both engines, for the metrics endpoints."""
+        return {
+            "sync": self.engine_monitor.stats(self.engine.pool),
+            "async": self.async_engine_monitor.stats(self.async_engine.sync_engine.pool),
+        }
@@ -0,0 +1,25 @@
+-- Indexes for the alert history endpoint (GET /alerts/), which pages newest first on
+-- (timestamp, alert_id), optionally filtered by camera or status, and loads each page's media
+-- by alert_id. src/models.py declares the same indexes, so databases created with create_all()
+-- already have them; apply this once to existing ones:
+--
+--   psql "$DATABASE_URL" -f migrations/0001_alert_history_indexes.sql
+--
+-- CONCURRENTLY builds each index without blocking alert inserts; it cannot run inside a
+-- transaction, so do not wrap this file in BEGIN/COMMIT (psql runs it in autocommit by default).
+-- If a build is interrupted it leaves an INVALID index: DROP INDEX CONCURRENTLY it and rerun.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alerts_timestamp_id
+    ON "Alerts" ("timestamp", alert_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alerts_camera_timestamp_id
+    ON "Alerts" (camera_id, "timestamp", alert_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alerts_status_timestamp_id
+    ON "Alerts" (status, "timestamp", alert_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_event_media_alert_id
+    ON "EventMedia" (alert_id);
+
+ANALYZE "Alerts";
+ANALYZE "EventMedia";
@@ -1,17 +1,19 @@
-from fastapi import APIRouter, UploadFile, File, Form
+from fastapi import APIRouter, Depends, UploadFile, File, Form
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.aws.service import upload_file_to_s3, retrieve_file
+from db import get_db
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
 
 @router.post("/file")
-async def upload_file(file: UploadFile = File(...), alert_id: int = Form()):
-    url = await upload_file_to_s3(file, alert_id, folder="uploads")
+async def upload_file(file: UploadFile = File(...), alert_id: int = Form(), db: AsyncSession = Depends(get_db)):
+    url = await upload_file_to_s3(file, alert_id, db, folder="uploads")
 
     return {"url": url}
 
 @router.get("/file")
-async def get_file_from_s3(alert_id: int = Form(...)):
-    url = await retrieve_file(alert_id)
+async def get_file_from_s3(alert_id: int = Form(...), db: AsyncSession = Depends(get_db)):
+    url = await retrieve_file(alert_id, db)
     if url:
         return {"url": url}
     return {"message": "File not found"}
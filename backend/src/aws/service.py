@@ -6,8 +6,9 @@ from typing import Optional
 import uuid
 import asyncio
 from src.aws.schemas import settings
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.models import EventMedia
-from db import SessionLocal
+from src.model_alert import crud
 
 s3_client = boto3.client(
     "s3",
@@ -16,7 +17,7 @@ s3_client = boto3.client(
     region_name=settings.AWS_REGION,
 )
 
-async def upload_file_to_s3(file: UploadFile, alert_id: int, folder: Optional[str] = None) -> str:
+async def upload_file_to_s3(file: UploadFile, alert_id: int, db: AsyncSession, folder: Optional[str] = None) -> str:
 
     file_extension = file.filename.split(".")[-1]
     unique_name = f"{uuid.uuid4()}.{file_extension}"
@@ -48,15 +49,11 @@ async def upload_file_to_s3(file: UploadFile, alert_id: int, folder: Optional[st
     )
 
     try:
-        db = SessionLocal()
         db.add(event_media)
-        db.commit()
-        db.refresh(event_media)
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
-    finally:
-        db.close()
 
     return key    
 
@@ -73,15 +70,12 @@ def get_s3_presigned_url(s3_key: str, expiration: int = 3600) -> str:
         raise Exception(f"Generating presigned URL failed: {e}")
     return
 
-async def retrieve_file(alert_id: int) -> Optional[str]:
-    db=SessionLocal()
+async def retrieve_file(alert_id: int, db: AsyncSession) -> Optional[str]:
     try:
-        media = db.query(EventMedia).filter(EventMedia.alert_id == alert_id).all()
+        media = await crud.get_event_media_async(db, alert_id)
         if media:
             s3_url = media[0].media_url
             return get_s3_presigned_url(s3_url)
     except Exception as e:
         return None
-    finally:
-        db.close()
     return None
\ No newline at end of file
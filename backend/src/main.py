@@ -5,6 +5,9 @@ from firebase_admin import credentials
 from src.user_initiated_alert.router import router as alert_router
 from src.model_alert.router import router as model_alert_router
 from src.aws.router import router as aws_router
+from src.model_alert import service as model_alert_service
+from src.model_alert.config import settings as model_alert_settings
+from src.model_alert.upload import UploadLimitMiddleware
 import db as db
 import os
 
@@ -17,8 +20,18 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Multipart overhead on top of the clip itself
+app.add_middleware(UploadLimitMiddleware, max_bytes=model_alert_settings.MAX_UPLOAD_BYTES + 64 * 1024)
+app.add_middleware(
+    UploadLimitMiddleware,
+    max_bytes=model_alert_settings.TIMELINE_MAX_UPLOAD_BYTES + 64 * 1024,
+    path_suffixes=("/timeline",),
+)
+
 @app.on_event("startup")
 async def on_startup() -> None:
+    model_alert_service.startup()
+
     if not firebase_admin._apps:
         try:
             _project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
@@ -32,6 +45,10 @@ async def on_startup() -> None:
         except Exception:
             pass
 
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    model_alert_service.shutdown()
+
 @app.get("/")
 async def read_root():
     return {"App": "Backend is running"}
@@ -1,11 +1,20 @@
-from datetime import datetime
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, Sequence
 
 from .. import models
 from firebase_admin import messaging
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import crud
+from .config import settings
+from .lookup_cache import CachedCamera, CachedRecipient, LookupCache, Route
+from db import SessionLocal
+
+logger = logging.getLogger(__name__)
 
 
 def send_fcm_alert(fcm_token: str, alert_data: Dict[str, Any]) -> bool:
@@ -28,6 +37,55 @@ def send_fcm_alert(fcm_token: str, alert_data: Dict[str, Any]) -> bool:
         return False
 
 
+lookup_cache = LookupCache(ttl_s=settings.LOOKUP_CACHE_TTL_S, max_entries=settings.LOOKUP_CACHE_MAX_ENTRIES)
+lookup_cache.watch()
+
+_delivery_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="fcm-delivery")
+_stats_lock = threading.Lock()
+_stats = {"created": 0, "db_seconds": 0.0, "pending": 0, "sent": 0, "failed": 0}
+
+
+def _deliver(alert_id: int, fcm_token: str, alert_data: Dict[str, Any]) -> None:
+    sent_ok = send_fcm_alert(fcm_token, alert_data)
+    db = SessionLocal()
+    try:
+        crud.set_alert_delivery(db, alert_id, sent_ok)
+    except Exception:
+        logger.exception("Could not record delivery status of alert %s", alert_id)
+    finally:
+        db.close()
+    with _stats_lock:
+        _stats["pending"] -= 1
+        _stats["sent" if sent_ok else "failed"] += 1
+
+
+def _route(db: Session, camera_id: int) -> Route:
+    generation = lookup_cache.generation
+    route = lookup_cache.get(camera_id)
+    if route is None:
+        camera, recipient = crud.get_camera_and_recipient(db, camera_id=camera_id)
+        route = lookup_cache.put(camera_id, camera, recipient, generation)
+    return route
+
+
+async def _route_async(db: AsyncSession, camera_id: int) -> Route:
+    generation = lookup_cache.generation
+    route = lookup_cache.get(camera_id)
+    if route is None:
+        camera, recipient = await crud.get_camera_and_recipient_async(db, camera_id=camera_id)
+        route = lookup_cache.put(camera_id, camera, recipient, generation)
+    return route
+
+
+async def get_recipient_async(db: AsyncSession) -> CachedRecipient | None:
+    """The user alerts are routed to, through ``lookup_cache``."""
+    generation = lookup_cache.generation
+    found, recipient = lookup_cache.get_recipient()
+    if found:
+        return recipient
+    return lookup_cache.put_recipient(await crud.get_first_user_async(db), generation)
+
+
 def create_and_send_alert(
     db: Session,
     *,
@@ -37,46 +95,109 @@ def create_and_send_alert(
     media_urls: Sequence[str],
     media_type: str = "video",
 ) -> models.Alert:
-    camera = crud.get_camera(db, camera_id=camera_id)
+    """
+    Insert the alert and its media in one transaction, then push it.
+
+    The camera and recipient come from ``lookup_cache`` (one query on a miss),
+    so usually only the inserts reach the database, and the transaction is
+    committed once. The push runs on a background thread, which moves the
+    alert from "pending" to "sent" or "failed" with its own short update, so
+    the returned alert is always "pending". It is detached from ``db`` with
+    its columns loaded, so reading them does not query again.
+    """
+    started = time.perf_counter()
+    camera, recipient = _route(db, camera_id)
     if camera is None:
         raise ValueError("Camera not found")
+    if recipient is None:
+        raise ValueError("No user configured to receive alerts")
 
-    recipient = db.query(models.User).first()
+    alert = crud.add_alert_with_media(
+        db,
+        camera_id=camera.camera_id,
+        recipient_id=recipient.user_id,
+        event_type=event_type,
+        confidence_score=confidence,
+        media_urls=media_urls,
+        media_type=media_type,
+        status="pending",
+        method="model",
+    )
+
+    alert_payload = _alert_payload(alert, camera, confidence)
+    fcm_token = recipient.fcm_token or ""
+
+    # Commit expires loaded attributes; detach first so the caller can read them without a refresh
+    db.expunge(alert)
+    db.commit()
+    _queue_delivery(alert.alert_id, fcm_token, alert_payload, time.perf_counter() - started)
+    return alert
+
+
+async def create_and_send_alert_async(
+    db: AsyncSession,
+    *,
+    camera_id: int,
+    event_type: str,
+    confidence: float | None,
+    media_urls: Sequence[str],
+    media_type: str = "video",
+) -> models.Alert:
+    """``create_and_send_alert`` for request handlers, on an AsyncSession."""
+    started = time.perf_counter()
+    camera, recipient = await _route_async(db, camera_id)
+    if camera is None:
+        raise ValueError("Camera not found")
     if recipient is None:
         raise ValueError("No user configured to receive alerts")
 
-    alert = crud.create_alert(
+    alert = await crud.add_alert_with_media_async(
         db,
-        camera=camera,
-        recipient=recipient,
+        camera_id=camera.camera_id,
+        recipient_id=recipient.user_id,
         event_type=event_type,
         confidence_score=confidence,
+        media_urls=media_urls,
+        media_type=media_type,
         status="pending",
         method="model",
     )
+    alert_payload = _alert_payload(alert, camera, confidence)
+    fcm_token = recipient.fcm_token or ""
+
+    await db.commit()
+    _queue_delivery(alert.alert_id, fcm_token, alert_payload, time.perf_counter() - started)
+    return alert
 
-    if media_urls:
-        crud.create_event_media(
-            db,
-            alert=alert,
-            media_urls=media_urls,
-            media_type=media_type,
-        )
 
-    alert_payload: Dict[str, Any] = {
-        "title": f"{event_type.capitalize()} detected",
+def _alert_payload(alert: models.Alert, camera: CachedCamera, confidence: float | None) -> Dict[str, Any]:
+    return {
+        "title": f"{alert.event_type.capitalize()} detected",
         "body": f"Camera {camera.location} | confidence {confidence:.2f}" if confidence is not None else "",
         "alert_id": alert.alert_id,
         "camera_id": camera.camera_id,
-        "event_type": event_type,
+        "event_type": alert.event_type,
     }
 
-    sent_ok = send_fcm_alert(recipient.fcm_token or "", alert_payload)
-    alert.status = "sent" if sent_ok else "failed"
-    if sent_ok:
-        alert.sent_at = datetime.utcnow()
-    db.add(alert)
-    db.commit()
-    db.refresh(alert)
 
-    return alert
\ No newline at end of file
+def _queue_delivery(alert_id: int, fcm_token: str, alert_data: Dict[str, Any], db_seconds: float) -> None:
+    with _stats_lock:
+        _stats["created"] += 1
+        _stats["db_seconds"] += db_seconds
+        _stats["pending"] += 1
+    _delivery_pool.submit(_deliver, alert_id, fcm_token, alert_data)
+
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        created = _stats["created"]
+        return {
+            "created": created,
+            "avg_db_ms": round(_stats["db_seconds"] / created * 1000.0, 3) if created else 0.0,
+            "deliveries": {key: _stats[key] for key in ("pending", "sent", "failed")},
+        }
+
+
+def shutdown() -> None:
+    """Wait for queued pushes so their alerts do not stay "pending"."""
+    _delivery_pool.shutdown(wait=True)
@@ -0,0 +1,285 @@
+"""
+Interchangeable inference backends for ViolenceSwin3D.
+
+    eager        the PyTorch module as loaded from the checkpoint
+    compile      torch.compile of the same module (compiled during warmup)
+    torchscript  a frozen TorchScript trace, exported ahead of time
+    onnx         an ONNX model run by ONNX Runtime on CPU, exported ahead of time
+
+Export an artifact from the checkpoint; logits are checked against eager:
+
+    python -m src.model_alert.backends export torchscript models/final_crime_detector.pth
+    python -m src.model_alert.backends export onnx models/final_crime_detector.pth
+
+and compare latency and throughput of the backends on a fixed set of clips:
+
+    python -m src.model_alert.backends compare sample.mp4 --checkpoint models/final_crime_detector.pth
+"""
+import argparse
+import gc
+import logging
+import os
+import statistics
+import time
+from typing import Callable, Dict, List
+
+import torch
+
+from src.model_alert.precision import PRECISIONS, Bf16Autocast, quantize_int8
+from src.model_alert.swin_model import ViolenceSwin3D
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_BACKENDS = ("eager", "compile", "torchscript", "onnx")
+ARTIFACT_SUFFIXES = {"torchscript": ".ts.pt", "onnx": ".onnx"}
+
+Runner = Callable[[torch.Tensor], torch.Tensor]
+
+
+def artifact_path_for(checkpoint_path: str, backend: str) -> str:
+    """Default artifact location: next to the checkpoint, e.g. final_crime_detector.onnx."""
+    root, _ = os.path.splitext(checkpoint_path)
+    return root + ARTIFACT_SUFFIXES[backend]
+
+
+def load_eager_model(checkpoint_path: str, num_classes: int, *, mmap: bool = False) -> torch.nn.Module:
+    model = ViolenceSwin3D(num_classes=num_classes, pretrained=False)
+    checkpoint = torch.load(checkpoint_path, map_location="cpu", mmap=mmap)
+    if isinstance(checkpoint, dict) and "model_state" in checkpoint:
+        state_dict = checkpoint["model_state"]
+    else:
+        state_dict = checkpoint
+    # assign=True keeps the mmapped tensors as parameters instead of copying them
+    result = model.load_state_dict(state_dict, strict=False, assign=mmap)
+    if result.missing_keys:
+        logger.warning("Checkpoint is missing %d keys: %s", len(result.missing_keys), result.missing_keys[:5])
+    return model.eval()
+
+
+def export(model: torch.nn.Module, backend: str, dst: str, *, num_frames: int = 16) -> None:
+    """Write the TorchScript or ONNX artifact for ``model``, with a dynamic batch dimension."""
+    # Batch of 2 so the batch dimension is not specialized to 1 while tracing
+    example = torch.randn(2, 3, num_frames, 224, 224)
+    model = model.eval().cpu()
+    if backend == "torchscript":
+        with torch.no_grad():
+            traced = torch.jit.freeze(torch.jit.trace(model, example, check_trace=False))
+        torch.jit.save(traced, dst)
+    elif backend == "onnx":
+        torch.onnx.export(
+            model,
+            (example,),
+            dst,
+            input_names=["clips"],
+            output_names=["logits"],
+            dynamic_shapes=({0: torch.export.Dim("batch", min=1, max=64)},),
+            dynamo=True,
+        )
+    else:
+        raise ValueError(f"Backend {backend!r} has no exported artifact; choose from {sorted(ARTIFACT_SUFFIXES)}")
+
+
+class _OnnxRunner:
+    def __init__(self, path: str):
+        try:
+            import onnxruntime
+        except ImportError as exc:
+            raise RuntimeError("The onnx backend needs the onnxruntime package") from exc
+        self._session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self._input = self._session.get_inputs()[0].name
+
+    def __call__(self, clips: torch.Tensor) -> torch.Tensor:
+        (logits,) = self._session.run(None, {self._input: clips.detach().cpu().float().numpy()})
+        return torch.from_numpy(logits)
+
+
+def load_runner(
+    backend: str,
+    *,
+    checkpoint_path: str,
+    num_classes: int,
+    device: str = "cpu",
+    artifact_path: str | None = None,
+    mmap: bool = False,
+    precision: str = "fp32",
+) -> Runner:
+    """
+    Build the callable that maps a (N, C, T, H, W) batch to logits.
+
+    eager and compile load ``checkpoint_path``; torchscript and onnx load
+    ``artifact_path`` (default: next to the checkpoint). ONNX Runtime always
+    runs on CPU. ``precision`` (see ``precision``) applies to eager and
+    compile only.
+    """
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}; choose from {INFERENCE_BACKENDS}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision {precision!r}; choose from {PRECISIONS}")
+    if precision != "fp32" and backend in ARTIFACT_SUFFIXES:
+        raise ValueError(f"{precision} precision needs the eager or compile backend, not {backend}")
+
+    if backend in ARTIFACT_SUFFIXES:
+        path = artifact_path or artifact_path_for(checkpoint_path, backend)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"{backend} artifact not found: {path} (create it with python -m src.model_alert.backends export)"
+            )
+        if backend == "onnx":
+            return _OnnxRunner(path)
+        return torch.jit.load(path, map_location=device).eval()
+
+    model = load_eager_model(checkpoint_path, num_classes, mmap=mmap).to(device)
+    if precision == "int8":
+        model = quantize_int8(model)
+    runner = torch.compile(model) if backend == "compile" else model
+    if precision == "bf16":
+        runner = Bf16Autocast(runner)
+    return runner
+
+
+def reference_logits(model: Runner, clips: List[torch.Tensor]) -> List[torch.Tensor]:
+    with torch.no_grad():
+        return [model(clip).float() for clip in clips]
+
+
+def compare_logits(reference: List[torch.Tensor], candidate: Runner, clips: List[torch.Tensor]) -> Dict[str, float]:
+    """Max absolute logit difference and top-1 agreement of ``candidate`` against the reference logits."""
+    max_diff = 0.0
+    agree = 0
+    with torch.no_grad():
+        for expected, clip in zip(reference, clips):
+            actual = candidate(clip).float()
+            max_diff = max(max_diff, (expected - actual).abs().max().item())
+            agree += int((expected.argmax(dim=1) == actual.argmax(dim=1)).all())
+    return {"max_abs_diff": max_diff, "top1_agreement": agree / len(clips) if clips else 1.0}
+
+
+def _load_clips(paths: List[str], count: int, num_frames: int) -> List[torch.Tensor]:
+    from src.model_alert.extract_frames import extract_frames
+    from src.model_alert.preprocess import INPUT_SIZE, frames_to_tensor
+
+    clips = []
+    for path in paths:
+        with open(path, "rb") as fh:
+            frames, _ = extract_frames(
+                fh.read(), num_frames=num_frames, size=(INPUT_SIZE, INPUT_SIZE), min_duration_s=0, max_duration_s=1e9
+            )
+        clips.append(frames_to_tensor(frames))
+    # Fixed seed so every backend sees the same synthetic clips
+    generator = torch.Generator().manual_seed(0)
+    while len(clips) < count:
+        clips.append(torch.randn(1, 3, num_frames, 224, 224, generator=generator))
+    return clips
+
+
+def _export_command(args, num_classes: int) -> int:
+    dst = args.output or artifact_path_for(args.checkpoint, args.backend)
+    model = load_eager_model(args.checkpoint, num_classes)
+
+    started = time.perf_counter()
+    export(model, args.backend, dst, num_frames=args.frames)
+    print(f"Exported {args.backend} to {dst} in {time.perf_counter() - started:.1f}s")
+
+    runner = load_runner(args.backend, checkpoint_path=args.checkpoint, num_classes=num_classes, artifact_path=dst)
+    clips = _load_clips(args.clips, args.samples, args.frames)
+    # Also check a batched call, since the artifact has a dynamic batch dimension
+    clips.append(torch.cat(clips[:2]))
+    parity = compare_logits(reference_logits(model, clips), runner, clips)
+    ok = parity["max_abs_diff"] <= args.atol and parity["top1_agreement"] == 1.0
+    print(
+        f"Parity on {len(clips)} inputs: max |logits diff| {parity['max_abs_diff']:.2e} "
+        f"(atol {args.atol:g}), top-1 agreement {parity['top1_agreement']:.0%} -> {'OK' if ok else 'FAILED'}"
+    )
+    return 0 if ok else 1
+
+
+def _compare_command(args, num_classes: int) -> int:
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    clips = _load_clips(args.clips, args.samples, args.frames)
+    batch = torch.cat([clips[i % len(clips)] for i in range(args.batch)])
+    # Reference logits up front, so only one backend's model is in memory at a time
+    reference = reference_logits(load_eager_model(args.checkpoint, num_classes), clips)
+
+    print(
+        f"{len(clips)} clips x {args.runs} runs, batch {args.batch}, "
+        f"{torch.get_num_threads()} intra-op threads\n"
+    )
+    print(f"{'backend':12s} {'load s':>7s} {'warmup s':>9s} {'p50 ms':>8s} {'p95 ms':>8s} {'clips/s':>8s} {'max diff':>9s}")
+    for backend in backends:
+        try:
+            started = time.perf_counter()
+            runner = load_runner(
+                backend, checkpoint_path=args.checkpoint, num_classes=num_classes, artifact_path=None
+            )
+            load_s = time.perf_counter() - started
+
+            with torch.no_grad():
+                # The first call compiles torch.compile and specializes TorchScript
+                started = time.perf_counter()
+                runner(clips[0])
+                runner(batch)
+                warmup_s = time.perf_counter() - started
+
+                latencies = []
+                for _ in range(args.runs):
+                    for clip in clips:
+                        started = time.perf_counter()
+                        runner(clip)
+                        latencies.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                for _ in range(args.runs):
+                    runner(batch)
+                throughput = args.runs * args.batch / (time.perf_counter() - started)
+            parity = compare_logits(reference, runner, clips)
+        except Exception as exc:
+            print(f"{backend:12s} unavailable: {exc}")
+            continue
+        finally:
+            runner = None
+            gc.collect()
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+        print(
+            f"{backend:12s} {load_s:7.2f} {warmup_s:9.2f} {statistics.median(latencies) * 1000:8.1f} "
+            f"{p95 * 1000:8.1f} {throughput:8.2f} {parity['max_abs_diff']:9.2e}"
+        )
+    return 0
+
+
+def main() -> None:
+    import json
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Export an artifact and check logits against eager")
+    export_parser.add_argument("backend", choices=sorted(ARTIFACT_SUFFIXES))
+    export_parser.add_argument("checkpoint", help="Training checkpoint (.pth) or converted weights")
+    export_parser.add_argument("-o", "--output", help="Artifact path (default: next to the checkpoint)")
+    export_parser.add_argument("--clips", nargs="*", default=[], help="Real clips to include in the parity check")
+    export_parser.add_argument("--samples", type=int, default=4, help="Inputs in the parity check (padded with noise)")
+    export_parser.add_argument("--atol", type=float, default=1e-3, help="Max allowed absolute logit difference")
+
+    compare_parser = commands.add_parser("compare", help="Latency/throughput report per backend")
+    compare_parser.add_argument("clips", nargs="*", help="Clips to run (padded with noise up to --samples)")
+    compare_parser.add_argument("--checkpoint", required=True, help="Checkpoint; artifacts are looked up next to it")
+    compare_parser.add_argument("--backends", default=",".join(INFERENCE_BACKENDS))
+    compare_parser.add_argument("--samples", type=int, default=2, help="Clip set size")
+    compare_parser.add_argument("--runs", type=int, default=3, help="Timed passes over the clip set")
+    compare_parser.add_argument("--batch", type=int, default=4, help="Batch size for the throughput run")
+
+    for sub in (export_parser, compare_parser):
+        sub.add_argument("--frames", type=int, default=16, help="Frames per clip")
+    args = parser.parse_args()
+
+    with open(os.path.join(os.path.dirname(__file__), "classes.json")) as fh:
+        num_classes = len(json.load(fh))
+
+    command = _export_command if args.command == "export" else _compare_command
+    raise SystemExit(command(args, num_classes))
+
+
+if __name__ == "__main__":
+    main()
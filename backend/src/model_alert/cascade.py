@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+import torch
+
+from src.model_alert.ai_model import load_inference_model, suspicion_score
+
+logger = logging.getLogger(__name__)
+
+# (label, alert type, confidence, version of the model that decided)
+Classification = Tuple[str, str, float, str]
+
+
+class ScreeningCascade:
+    """
+    Two-stage classification: a small screener in front of ``ViolenceSwin3D``.
+
+    Every clip is scored by the screener from ``ai_model``; only clips whose
+    suspicion (probability of anything but "normal") reaches ``threshold`` are
+    escalated to the full model, the rest are answered "normal" directly. To
+    measure agreement with Swin-only decisions, a random ``audit_rate``
+    fraction of screened-out clips is also run through the full model in the
+    background; escalated clips always agree by construction. Until the
+    screener is loaded every clip goes to the full model.
+    """
+
+    def __init__(self, screener_path: str, *, threshold: float = 0.3, audit_rate: float = 0.0):
+        self.screener_path = screener_path
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        # Reported as the model version of clips the screener answers itself
+        self.version = f"screener:{os.path.basename(screener_path)}"
+        self._model: torch.nn.Module | None = None
+        # The screener is cheap; keep it off the single Swin3D thread
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screener")
+        self._audits: set[asyncio.Task] = set()
+
+        self.clips = 0
+        self.escalated = 0
+        self.audited = 0
+        self.audit_agreed = 0
+        self._screen_total_s = 0.0
+        self._full_total_s = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._model is not None
+
+    def start(self) -> None:
+        self._pool.submit(self._load)
+
+    def _load(self) -> None:
+        try:
+            model = load_inference_model(self.screener_path)
+            suspicion_score(torch.zeros(1, 3, 16, 224, 224), model)
+            self._model = model
+            logger.info("Screening model ready (%s)", self.screener_path)
+        except Exception:
+            logger.exception("Failed to load screening model; all clips go to the full model")
+
+    async def classify(
+        self,
+        clip: torch.Tensor,
+        full: Callable[[torch.Tensor], Awaitable[Classification]],
+    ) -> Classification:
+        if not self.ready:
+            return await full(clip)
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        suspicion = await loop.run_in_executor(self._pool, suspicion_score, clip, self._model)
+        self._screen_total_s += time.perf_counter() - started
+        self.clips += 1
+
+        if suspicion >= self.threshold:
+            self.escalated += 1
+            started = time.perf_counter()
+            result = await full(clip)
+            self._full_total_s += time.perf_counter() - started
+            return result
+
+        if self.audit_rate > 0 and random.random() < self.audit_rate:
+            task = loop.create_task(self._audit(clip, full))
+            self._audits.add(task)
+            task.add_done_callback(self._audits.discard)
+        return "normal", "normal", 1.0 - suspicion, self.version
+
+    async def _audit(self, clip: torch.Tensor, full: Callable[[torch.Tensor], Awaitable[Classification]]) -> None:
+        try:
+            _, alert_type, _, _ = await full(clip)
+        except Exception as exc:
+            logger.warning("Cascade audit failed: %s", exc)
+            return
+        self.audited += 1
+        if alert_type == "normal":
+            self.audit_agreed += 1
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        passed = self.clips - self.escalated
+        audit_agreement = self.audit_agreed / self.audited if self.audited else None
+        # Escalated clips match Swin-only by construction; screened-out ones at the audited rate
+        agreement = None
+        if audit_agreement is not None and self.clips:
+            agreement = (self.escalated + passed * audit_agreement) / self.clips
+        return {
+            "ready": self.ready,
+            "threshold": self.threshold,
+            "clips": self.clips,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / self.clips, 4) if self.clips else 0.0,
+            "avg_screen_ms": round(self._screen_total_s / self.clips * 1000.0, 3) if self.clips else 0.0,
+            "avg_full_ms": round(self._full_total_s / self.escalated * 1000.0, 3) if self.escalated else 0.0,
+            "audit_rate": self.audit_rate,
+            "audited": self.audited,
+            "audit_agreement": round(audit_agreement, 4) if audit_agreement is not None else None,
+            "estimated_agreement": round(agreement, 4) if agreement is not None else None,
+        }
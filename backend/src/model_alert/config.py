@@ -0,0 +1,116 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class InferenceSettings(BaseSettings):
+    # Model loading; the checkpoint defaults to models/final_crime_detector.pth
+    MODEL_CHECKPOINT_PATH: str | None = None
+    MODEL_WARMUP_RUNS: int = 1
+    # Memory-map the checkpoint so uvicorn workers share weight pages (CPU only)
+    MODEL_MMAP: bool = True
+    # Where the mapped copy of the checkpoint lives (default: <tmp>/model-snapshots); the checkpoint
+    # itself can then be overwritten safely
+    MODEL_SNAPSHOT_DIR: str | None = None
+    # Forward pass backend: "eager", "compile", "torchscript" or "onnx"; the last two load an
+    # artifact from "python -m src.model_alert.backends export" (default: next to the checkpoint)
+    MODEL_BACKEND: str = "eager"
+    MODEL_ARTIFACT_PATH: str | None = None
+    # CPU precision for eager/compile: "fp32", "int8" (dynamic quantization) or "bf16" (autocast)
+    MODEL_PRECISION: str = "fp32"
+    # Hot-swap: a replacement model must give sane logits on this clip (default: a fixed random
+    # clip) before it serves; the model file is polled for changes every interval (0 disables)
+    MODEL_CANARY_CLIP: str | None = None
+    MODEL_WATCH_INTERVAL_S: float = 0.0
+
+    # Inference profiles (name=FRAMESxSIZE), each warmed up at startup; cameras are assigned with
+    # INFERENCE_CAMERA_PROFILES ("3=fast,12=accurate") and /detect?profile= overrides per request
+    INFERENCE_PROFILES: str = "fast=8x160,accurate=16x224"
+    INFERENCE_DEFAULT_PROFILE: str = "accurate"
+    INFERENCE_CAMERA_PROFILES: str = ""
+
+    # Micro-batching of /detect clips into a single forward pass
+    MAX_BATCH_SIZE: int = 8
+    MAX_BATCH_WAIT_MS: float = 10.0
+
+    # Upload limits for /detect; container and duration are probed from the first bytes
+    MAX_UPLOAD_BYTES: int = 64 * 1024 * 1024
+    UPLOAD_PROBE_BYTES: int = 1024 * 1024
+
+    # Frame sampling: "auto", "seek", "sequential" or "keyframe" (needs PyAV)
+    DECODE_STRATEGY: str = "auto"
+    # Clip decoding: "auto" (PyAV from memory when installed), "pyav" or "opencv"
+    DECODE_BACKEND: str = "auto"
+
+    # Clips whose motion score is below this skip the model and report "normal" (0 disables)
+    MOTION_THRESHOLD: float = 0.0
+
+    # Two-stage cascade: a screener (ai_model.ClipScreener weights) runs first and only clips
+    # with suspicion >= CASCADE_THRESHOLD reach Swin3D; CASCADE_AUDIT_RATE of the rest are
+    # re-checked by Swin3D in the background to measure agreement. Off unless set; the weights come
+    # from python -m src.model_alert.distill_screener, and a missing file keeps Swin3D-only
+    CASCADE_SCREENER_PATH: str | None = None
+    CASCADE_THRESHOLD: float = 0.3
+    CASCADE_AUDIT_RATE: float = 0.05
+
+    # Results of repeated /detect uploads, keyed by clip hash + sampling params + model version
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 1024
+    RESULT_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+    RESULT_CACHE_TTL_S: float = 600.0
+    # SQLite file to keep the cache across restarts
+    RESULT_CACHE_PATH: str | None = None
+
+    # Per-camera incident tracking: EMA of detection confidence with hysteresis; one alert per
+    # incident, follow-up detections update it until INCIDENT_COOLDOWN_S without detections.
+    # The default open threshold of 0 alerts on the first detection; raising it suppresses isolated
+    # low-confidence detections at the cost of recall. At most INCIDENT_MAX_CAMERAS are tracked.
+    INCIDENT_EMA_ALPHA: float = 0.5
+    INCIDENT_OPEN_THRESHOLD: float = 0.0
+    INCIDENT_CLOSE_THRESHOLD: float = 0.2
+    INCIDENT_COOLDOWN_S: float = 60.0
+    INCIDENT_MAX_CAMERAS: int = 4096
+
+    # Camera and alert-recipient lookups, cached per process and dropped when a Camera or User is
+    # written through the ORM (0 TTL disables)
+    LOOKUP_CACHE_TTL_S: float = 300.0
+    LOOKUP_CACHE_MAX_ENTRIES: int = 1024
+
+    # Long-video timeline jobs: overlapping windows of STREAM_WINDOW_FRAMES frames sampled at
+    # TIMELINE_SAMPLE_FPS, one every TIMELINE_WINDOW_STRIDE frames, TIMELINE_BATCH_SIZE per forward pass
+    TIMELINE_MAX_UPLOAD_BYTES: int = 2 * 1024 * 1024 * 1024
+    TIMELINE_SAMPLE_FPS: float = 2.0
+    TIMELINE_WINDOW_STRIDE: int = 8
+    TIMELINE_BATCH_SIZE: int = 4
+    TIMELINE_CONCURRENCY: int = 1
+    TIMELINE_MAX_JOBS: int = 32
+
+    # Request pipeline: decode (INFERENCE_WORKERS in a "thread" or "process" pool) ->
+    # preprocess (PREPROCESS_WORKERS threads) -> batched inference, with PIPELINE_QUEUE_SIZE
+    # slots in front of each stage; admission control caps requests in flight
+    INFERENCE_EXECUTOR: str = "thread"
+    INFERENCE_WORKERS: int = 2
+    PREPROCESS_WORKERS: int = 1
+    PIPELINE_QUEUE_SIZE: int = 8
+    INFERENCE_QUEUE_SIZE: int = 16
+    INFERENCE_RETRY_AFTER_S: int = 2
+
+    # Live camera ingestion: sliding windows of STREAM_WINDOW_FRAMES frames sampled
+    # at STREAM_SAMPLE_FPS, analysed every STREAM_WINDOW_STRIDE new frames
+    STREAM_INGESTION_ENABLED: bool = False
+    # Cameras whose status is listed are streamed; the weight is their share of the model
+    STREAM_STATUS_WEIGHTS: str = "priority=3,active=1"
+    # "weighted" or "round_robin"; windows older than STREAM_MAX_LAG_S (default two strides) are dropped
+    STREAM_SCHEDULING: str = "weighted"
+    STREAM_MAX_IN_FLIGHT: int = 4
+    STREAM_MAX_LAG_S: float | None = None
+    STREAM_SAMPLE_FPS: float = 2.0
+    STREAM_WINDOW_FRAMES: int = 16
+    STREAM_WINDOW_STRIDE: int = 8
+    STREAM_REFRESH_S: float = 30.0
+    STREAM_RECONNECT_S: float = 5.0
+    # Restart local file sources at EOF (useful as a test camera)
+    STREAM_LOOP_FILES: bool = False
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+
+settings = InferenceSettings()
@@ -0,0 +1,56 @@
+"""
+Convert a training checkpoint into a plain, mmap-friendly state dict.
+
+    python -m src.model_alert.convert_checkpoint models/final_crime_detector.pth \
+        models/final_crime_detector.weights.pt
+
+The output holds only contiguous float32 model weights (no optimizer state or
+pickled extras), so ``torch.load(..., mmap=True, weights_only=True)`` can map it
+straight from the page cache. Point MODEL_CHECKPOINT_PATH at the result and
+every uvicorn worker shares the same read-only weight pages.
+"""
+import argparse
+import os
+
+import torch
+
+
+def convert(src: str, dst: str) -> int:
+    checkpoint = torch.load(src, map_location="cpu")
+    if isinstance(checkpoint, dict) and "model_state" in checkpoint:
+        state_dict = checkpoint["model_state"]
+    else:
+        state_dict = checkpoint
+
+    weights = {}
+    for name, tensor in state_dict.items():
+        if not isinstance(tensor, torch.Tensor):
+            continue
+        if tensor.is_floating_point():
+            tensor = tensor.float()
+        weights[name] = tensor.contiguous().clone()
+
+    torch.save(weights, dst)
+
+    reloaded = torch.load(dst, map_location="cpu", mmap=True, weights_only=True)
+    for name, tensor in weights.items():
+        if not torch.equal(reloaded[name], tensor):
+            raise ValueError(f"Round-trip mismatch for {name}")
+    return len(weights)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("src", help="Training checkpoint (.pth)")
+    parser.add_argument("dst", help="Output weights file")
+    args = parser.parse_args()
+
+    count = convert(args.src, args.dst)
+    print(
+        f"Wrote {count} tensors to {args.dst} "
+        f"({os.path.getsize(args.src) / 2**20:.1f} MB -> {os.path.getsize(args.dst) / 2**20:.1f} MB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Distill the cascade's ClipScreener from the full ViolenceSwin3D model.
+
+    python -m src.model_alert.distill_screener models/final_crime_detector.pth models/screener.pth \
+        footage/ more/clip1.mp4 more/clip2.mp4
+
+There is no labelled dataset for the screener, so the full model is the
+teacher: every window of the given videos (cut like the timeline and live
+streams do) is scored by Swin3D, its class probabilities are summed into
+normal / theft / violence, and the screener is trained to match them. A
+held-out share of the windows is then screened at ``--threshold``; the
+report gives the recall of the full model's alerts (the windows the cascade
+would still escalate) and the escalation rate. The weights are only written
+when that recall reaches ``--min-recall``. Use footage like the cameras'
+and set CASCADE_THRESHOLD to the threshold it was checked at.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from typing import List, Tuple
+
+import torch
+import torch.nn.functional as F
+
+from src.model_alert.ai_model import CLASS_LABELS, ClipScreener, suspicion_score
+from src.model_alert.backends import load_eager_model
+from src.model_alert.preprocess import frames_to_tensor
+from src.model_alert.timeline import VideoWindows
+
+VIDEO_SUFFIXES = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+
+def _video_paths(paths: List[str]) -> List[str]:
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                videos += [os.path.join(root, name) for name in sorted(names) if name.lower().endswith(VIDEO_SUFFIXES)]
+        else:
+            videos.append(path)
+    return videos
+
+
+def _class_groups(classes: List[str]) -> torch.Tensor:
+    """(num_classes, len(CLASS_LABELS)) 0/1 matrix: Swin3D class -> screener label (service.PREDICTION_TO_ALERT_MAP)."""
+    groups = torch.zeros(len(classes), len(CLASS_LABELS))
+    for i, name in enumerate(classes):
+        label = name if name in ("normal", "violence") else "theft"
+        groups[i, CLASS_LABELS.index(label)] = 1.0
+    return groups
+
+
+def label_windows(
+    teacher: torch.nn.Module, screener: ClipScreener, videos: List[str], classes: List[str], args
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Reduced screener inputs and the teacher's normal/theft/violence probabilities for every window."""
+    groups = _class_groups(classes)
+    inputs, targets = [], []
+    started = time.perf_counter()
+    for path in videos:
+        try:
+            windows = VideoWindows(path, window=args.frames, stride=args.stride, sample_fps=args.fps)
+        except ValueError as exc:
+            print(f"Skipping {path}: {exc}")
+            continue
+        for _, _, frames in windows:
+            clip = frames_to_tensor(frames)
+            with torch.no_grad():
+                probs = torch.softmax(teacher(clip).float(), dim=1)
+                inputs.append(screener.reduce(clip))
+            targets.append(probs @ groups)
+            if args.max_windows and len(inputs) >= args.max_windows:
+                break
+        print(f"{len(inputs)} windows labelled ({time.perf_counter() - started:.0f}s)", flush=True)
+        if args.max_windows and len(inputs) >= args.max_windows:
+            break
+    if not inputs:
+        raise SystemExit("No windows to train on")
+    return torch.cat(inputs), torch.cat(targets)
+
+
+def train(screener: ClipScreener, inputs: torch.Tensor, targets: torch.Tensor, args) -> None:
+    optimizer = torch.optim.AdamW(screener.parameters(), lr=args.lr, weight_decay=1e-4)
+    # Most footage is normal; weight windows the teacher alerts on so they are not drowned out
+    weights = torch.where(targets[:, CLASS_LABELS.index("normal")] < 0.5, args.alert_weight, 1.0)
+    for epoch in range(args.epochs):
+        screener.train()
+        order = torch.randperm(len(inputs))
+        total = 0.0
+        for start in range(0, len(order), args.batch_size):
+            idx = order[start : start + args.batch_size]
+            log_probs = F.log_softmax(screener(inputs[idx]), dim=1)
+            loss = (-(targets[idx] * log_probs).sum(dim=1) * weights[idx]).sum() / weights[idx].sum()
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(idx)
+        print(f"epoch {epoch + 1}/{args.epochs}: loss {total / len(order):.4f}", flush=True)
+    screener.eval()
+
+
+def evaluate(screener: ClipScreener, inputs: torch.Tensor, targets: torch.Tensor, threshold: float) -> dict:
+    """What the cascade would do at ``threshold`` on windows the screener was not trained on."""
+    alerts = targets.argmax(dim=1) != CLASS_LABELS.index("normal")
+    escalated = torch.tensor([suspicion_score(inputs[i : i + 1], screener) >= threshold for i in range(len(inputs))])
+    return {
+        "windows": len(inputs),
+        "teacher_alerts": int(alerts.sum()),
+        "alert_recall": round(float((escalated & alerts).sum() / alerts.sum()), 4) if alerts.any() else None,
+        "escalation_rate": round(float(escalated.float().mean()), 4),
+        "threshold": threshold,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("checkpoint", help="Swin3D checkpoint used as the teacher")
+    parser.add_argument("output", help="Screener weights to write (CASCADE_SCREENER_PATH)")
+    parser.add_argument("videos", nargs="+", help="Video files or directories of them")
+    parser.add_argument("--frames", type=int, default=16, help="Frames per window")
+    parser.add_argument("--stride", type=int, default=8, help="Sampled frames between windows")
+    parser.add_argument("--fps", type=float, default=2.0, help="Sampling rate")
+    parser.add_argument("--max-windows", type=int, default=0, help="Stop labelling after this many windows (0: all)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of windows kept for the recall check")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--alert-weight", type=float, default=4.0, help="Loss weight of windows the teacher alerts on")
+    parser.add_argument("--imagenet", action="store_true", help="Start the trunk from ImageNet weights (downloads them)")
+    parser.add_argument("--threshold", type=float, default=0.3, help="CASCADE_THRESHOLD to check recall at")
+    parser.add_argument("--min-recall", type=float, default=0.95, help="Minimum held-out alert recall to write weights")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    with open(os.path.join(os.path.dirname(__file__), "classes.json")) as fh:
+        classes = [name for _, name in sorted(json.load(fh).items(), key=lambda item: int(item[0]))]
+
+    videos = _video_paths(args.videos)
+    teacher = load_eager_model(args.checkpoint, len(classes))
+    screener = ClipScreener(pretrained_backbone=args.imagenet)
+    inputs, targets = label_windows(teacher, screener, videos, classes, args)
+    del teacher
+
+    order = list(range(len(inputs)))
+    random.Random(args.seed).shuffle(order)
+    held_out = max(1, int(len(order) * args.holdout)) if len(order) > 1 else 0
+    test_idx, train_idx = torch.tensor(order[:held_out], dtype=torch.long), torch.tensor(order[held_out:], dtype=torch.long)
+
+    train(screener, inputs[train_idx], targets[train_idx], args)
+    report = evaluate(screener, inputs[test_idx], targets[test_idx], args.threshold)
+    print(json.dumps(report))
+
+    if report["alert_recall"] is None:
+        print("The held-out windows contain no teacher alerts; add footage with incidents. Weights not written.")
+        raise SystemExit(1)
+    if report["alert_recall"] < args.min_recall:
+        print(f"Alert recall {report['alert_recall']} < {args.min_recall}; weights not written.")
+        raise SystemExit(1)
+    torch.save({"model_state": screener.state_dict(), "distillation": report}, args.output)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import collections
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Tuple
+
+ALERT_TYPES = ("theft", "violence")
+
+
+@dataclass
+class Incident:
+    camera_id: int
+    event_type: str
+    opened_at: float
+    last_positive_at: float
+    max_confidence: float
+    alert_id: int | None = None
+    updates: int = 0
+
+
+@dataclass
+class _CameraState:
+    last_seen: float
+    ema: Dict[str, float] = field(default_factory=dict)
+    recent: collections.deque = field(default_factory=lambda: collections.deque(maxlen=8))
+    incidents: Dict[str, Incident] = field(default_factory=dict)
+
+
+class IncidentTracker:
+    """
+    Turn a camera's stream of per-clip predictions into alert decisions.
+
+    Each camera keeps an exponential moving average (weight ``alpha`` on the
+    newest clip) of the confidence for every alert type, counting other
+    predictions as 0. An incident opens when the average reaches
+    ``open_threshold`` and closes only once it has dropped below
+    ``close_threshold`` and nothing was detected for ``cooldown_s``. While an
+    incident is open, further detections of that type update it rather than
+    opening a new one. Observations more than ``cooldown_s`` apart start from
+    a fresh average, so a single strong detection after a quiet period still
+    opens an incident immediately.
+
+    The EMA is of the predicted class's top-1 confidence, which on its own
+    can be low even for a clear incident (the model spreads theft over four
+    classes). The default ``open_threshold`` of 0 therefore opens on the
+    first theft/violence prediction, like alerting without a tracker; raising
+    it trades recall for fewer alerts on isolated low-confidence detections.
+
+    Cameras not seen for ``cooldown_s`` are forgotten (their state would be
+    reset anyway), and at most ``max_cameras`` are tracked, least recently
+    seen first out, so unknown camera ids cannot grow the state without bound.
+
+    ``observe()`` returns ``("open", incident)``, ``("update", incident)``
+    when an open incident's confidence rises, or ``("none", incident_or_None)``.
+    """
+
+    def __init__(
+        self,
+        *,
+        alpha: float = 0.5,
+        open_threshold: float = 0.0,
+        close_threshold: float = 0.2,
+        cooldown_s: float = 60.0,
+        window: int = 8,
+        max_cameras: int = 4096,
+    ):
+        self.alpha = alpha
+        self.open_threshold = open_threshold
+        self.close_threshold = close_threshold
+        self.cooldown_s = cooldown_s
+        self.window = window
+        self.max_cameras = max(1, int(max_cameras))
+        self._lock = threading.Lock()
+        self._cameras: collections.OrderedDict[int, _CameraState] = collections.OrderedDict()
+        self._pruned_at = 0.0
+
+        self.observations = 0
+        self.opened = 0
+        self.updated = 0
+        self.suppressed = 0
+        self.closed = 0
+        self.expired_cameras = 0
+
+    def observe(
+        self, camera_id: int, alert_type: str, confidence: float, now: float | None = None
+    ) -> Tuple[str, Incident | None]:
+        now = time.time() if now is None else now
+        with self._lock:
+            self.observations += 1
+            if now - self._pruned_at >= self.cooldown_s:
+                self._prune(now)
+            state = self._cameras.get(camera_id)
+            if state is None:
+                state = self._cameras[camera_id] = _CameraState(
+                    last_seen=now, recent=collections.deque(maxlen=self.window)
+                )
+                while len(self._cameras) > self.max_cameras:
+                    _, evicted = self._cameras.popitem(last=False)
+                    self.closed += len(evicted.incidents)
+                    self.expired_cameras += 1
+            elif now - state.last_seen > self.cooldown_s:
+                # Quiet for a whole cooldown: start over
+                self.closed += len(state.incidents)
+                state.incidents.clear()
+                state.ema.clear()
+            self._cameras.move_to_end(camera_id)
+            state.last_seen = now
+            state.recent.append((now, alert_type, round(confidence, 4)))
+
+            for event_type in ALERT_TYPES:
+                score = confidence if alert_type == event_type else 0.0
+                previous = state.ema.get(event_type)
+                state.ema[event_type] = score if previous is None else self.alpha * score + (1 - self.alpha) * previous
+
+            for event_type, incident in list(state.incidents.items()):
+                if (
+                    state.ema[event_type] < self.close_threshold
+                    and now - incident.last_positive_at >= self.cooldown_s
+                ):
+                    del state.incidents[event_type]
+                    self.closed += 1
+
+            if alert_type not in ALERT_TYPES:
+                return "none", None
+
+            incident = state.incidents.get(alert_type)
+            if incident is not None:
+                incident.last_positive_at = now
+                if confidence > incident.max_confidence:
+                    incident.max_confidence = confidence
+                    incident.updates += 1
+                    self.updated += 1
+                    return "update", incident
+                self.suppressed += 1
+                return "none", incident
+
+            if state.ema[alert_type] >= self.open_threshold:
+                incident = Incident(
+                    camera_id=camera_id,
+                    event_type=alert_type,
+                    opened_at=now,
+                    last_positive_at=now,
+                    max_confidence=confidence,
+                )
+                state.incidents[alert_type] = incident
+                self.opened += 1
+                return "open", incident
+
+            self.suppressed += 1
+            return "none", None
+
+    def _prune(self, now: float) -> None:
+        self._pruned_at = now
+        # Least recently seen first, so stop at the first camera still active
+        while self._cameras:
+            camera_id, state = next(iter(self._cameras.items()))
+            if now - state.last_seen <= self.cooldown_s:
+                break
+            del self._cameras[camera_id]
+            self.closed += len(state.incidents)
+            self.expired_cameras += 1
+
+    def abandon(self, incident: Incident) -> None:
+        """Forget an incident whose alert could not be created."""
+        with self._lock:
+            state = self._cameras.get(incident.camera_id)
+            if state is not None and state.incidents.get(incident.event_type) is incident:
+                del state.incidents[incident.event_type]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            cameras = {
+                camera_id: {
+                    "ema": {event_type: round(value, 4) for event_type, value in state.ema.items()},
+                    "recent": list(state.recent),
+                    "open_incidents": {
+                        event_type: {
+                            "alert_id": incident.alert_id,
+                            "opened_at": incident.opened_at,
+                            "max_confidence": round(incident.max_confidence, 4),
+                            "updates": incident.updates,
+                        }
+                        for event_type, incident in state.incidents.items()
+                    },
+                }
+                for camera_id, state in self._cameras.items()
+            }
+        return {
+            "alpha": self.alpha,
+            "open_threshold": self.open_threshold,
+            "close_threshold": self.close_threshold,
+            "cooldown_s": self.cooldown_s,
+            "max_cameras": self.max_cameras,
+            "expired_cameras": self.expired_cameras,
+            "observations": self.observations,
+            "opened": self.opened,
+            "updated": self.updated,
+            "suppressed": self.suppressed,
+            "closed": self.closed,
+            "cameras": cameras,
+        }
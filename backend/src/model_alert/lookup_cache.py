@@ -0,0 +1,201 @@
+import collections
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from src import models
+
+
+@dataclass(frozen=True)
+class CachedCamera:
+    camera_id: int
+    location: str | None
+
+
+@dataclass(frozen=True)
+class CachedRecipient:
+    user_id: int
+    fcm_token: str | None
+
+
+Route = Tuple[CachedCamera | None, CachedRecipient | None]
+
+_MISSING = object()
+# Pending invalidation of the recipient, next to camera ids in a session's pending set
+_RECIPIENT = "recipient"
+
+
+class LookupCache:
+    """
+    Read-through cache of what every alert looks up: the Camera row and the
+    user alerts are routed to.
+
+    Entries are immutable snapshots, so they are safe to share between
+    sessions and threads. They expire ``ttl_s`` after they are loaded and are
+    dropped as soon as a transaction that wrote a Camera or User through the
+    ORM commits (see ``watch``); ``query().update()`` and writes from outside
+    the app are only picked up at expiry. At most ``max_entries`` cameras are kept, least
+    recently used first out. Unknown camera ids are cached as well, so a bad
+    id does not reach the database on every alert. ``ttl_s <= 0`` disables
+    caching.
+    """
+
+    def __init__(self, *, ttl_s: float = 300.0, max_entries: int = 1024):
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        # camera_id -> (expires_at, camera or None if it does not exist)
+        self._cameras: collections.OrderedDict[int, Tuple[float, CachedCamera | None]] = collections.OrderedDict()
+        self._recipient: Tuple[float, CachedRecipient | None] | None = None
+        # Bumped by every invalidation; a load that started before one is not stored
+        self.generation = 0
+        # Session.info key of the cameras/recipient a session has written but not committed yet
+        self._pending_key = f"lookup_cache_pending_{id(self)}"
+
+        self.camera_hits = 0
+        self.camera_misses = 0
+        self.recipient_hits = 0
+        self.recipient_misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_s > 0
+
+    def get(self, camera_id: int) -> Route | None:
+        """The cached (camera, recipient) for ``camera_id``, or None if either has to be loaded."""
+        now = time.monotonic()
+        with self._lock:
+            camera = _MISSING
+            entry = self._cameras.get(camera_id)
+            if entry is not None and entry[0] > now:
+                self._cameras.move_to_end(camera_id)
+                camera = entry[1]
+                self.camera_hits += 1
+            else:
+                self.camera_misses += 1
+            if camera is None:
+                # Unknown camera: no recipient needed
+                return None, None
+
+            recipient = self._get_recipient(now)
+            if camera is _MISSING or recipient is _MISSING:
+                return None
+            return camera, recipient
+
+    def get_recipient(self) -> Tuple[bool, CachedRecipient | None]:
+        """(True, recipient) if the recipient is cached (None: there is no user), else (False, None)."""
+        with self._lock:
+            recipient = self._get_recipient(time.monotonic())
+        return (False, None) if recipient is _MISSING else (True, recipient)
+
+    def _get_recipient(self, now: float):
+        if self._recipient is not None and self._recipient[0] > now:
+            self.recipient_hits += 1
+            return self._recipient[1]
+        self.recipient_misses += 1
+        return _MISSING
+
+    def put(self, camera_id: int, camera: models.Camera | None, recipient: models.User | None, generation: int) -> Route:
+        """
+        Store the rows loaded for ``camera_id`` (as read with
+        ``generation`` = ``self.generation`` taken before the query) and
+        return their snapshots.
+        """
+        cached_camera = CachedCamera(camera.camera_id, camera.location) if camera is not None else None
+        cached_recipient = CachedRecipient(recipient.user_id, recipient.fcm_token) if recipient is not None else None
+        if not self.enabled:
+            return cached_camera, cached_recipient
+
+        expires_at = time.monotonic() + self.ttl_s
+        with self._lock:
+            if generation != self.generation:
+                return cached_camera, cached_recipient
+            self._cameras[camera_id] = (expires_at, cached_camera)
+            self._cameras.move_to_end(camera_id)
+            while len(self._cameras) > self.max_entries:
+                self._cameras.popitem(last=False)
+                self.evictions += 1
+            # The recipient comes from an outer join on the camera, so it is only known if the camera exists
+            if camera is not None:
+                self._recipient = (expires_at, cached_recipient)
+        return cached_camera, cached_recipient
+
+    def put_recipient(self, recipient: models.User | None, generation: int) -> CachedRecipient | None:
+        cached_recipient = CachedRecipient(recipient.user_id, recipient.fcm_token) if recipient is not None else None
+        if self.enabled:
+            with self._lock:
+                if generation == self.generation:
+                    self._recipient = (time.monotonic() + self.ttl_s, cached_recipient)
+        return cached_recipient
+
+    def invalidate_camera(self, camera_id: int | None = None) -> None:
+        """Drop one camera, or all of them."""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            if camera_id is None:
+                self._cameras.clear()
+            else:
+                self._cameras.pop(camera_id, None)
+
+    def invalidate_recipient(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._recipient = None
+
+    def watch(self) -> None:
+        """
+        Invalidate when a transaction that inserted, updated or deleted a
+        Camera or User through the ORM commits. The written keys are collected
+        at flush and applied after commit: invalidating at flush would let a
+        lookup between flush and commit cache the old row again. A rollback
+        discards them, since nothing changed.
+        """
+        for name in ("after_insert", "after_update", "after_delete"):
+            event.listen(models.Camera, name, lambda mapper, connection, target: self._written(target, target.camera_id))
+            event.listen(models.User, name, lambda mapper, connection, target: self._written(target, _RECIPIENT))
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", lambda session: session.info.pop(self._pending_key, None))
+
+    def _written(self, target: Any, key: Any) -> None:
+        session = object_session(target)
+        if session is None:
+            self._invalidate(key)
+        else:
+            session.info.setdefault(self._pending_key, set()).add(key)
+
+    def _after_commit(self, session: Session) -> None:
+        for key in session.info.pop(self._pending_key, ()):
+            self._invalidate(key)
+
+    def _invalidate(self, key: Any) -> None:
+        if key is _RECIPIENT:
+            self.invalidate_recipient()
+        else:
+            self.invalidate_camera(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            camera_lookups = self.camera_hits + self.camera_misses
+            recipient_lookups = self.recipient_hits + self.recipient_misses
+            return {
+                "enabled": self.enabled,
+                "ttl_s": self.ttl_s,
+                "cameras": len(self._cameras),
+                "max_entries": self.max_entries,
+                "camera_hits": self.camera_hits,
+                "camera_misses": self.camera_misses,
+                "camera_hit_ratio": round(self.camera_hits / camera_lookups, 4) if camera_lookups else 0.0,
+                "recipient_hits": self.recipient_hits,
+                "recipient_misses": self.recipient_misses,
+                "recipient_hit_ratio": round(self.recipient_hits / recipient_lookups, 4) if recipient_lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,35 @@
+import os
+import resource
+from typing import Any, Dict
+
+_SMAPS_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_clean_mb",
+    "Shared_Dirty": "shared_dirty_mb",
+    "Private_Clean": "private_clean_mb",
+    "Private_Dirty": "private_dirty_mb",
+}
+
+
+def process_memory() -> Dict[str, Any]:
+    """
+    Memory report for the current worker process.
+
+    On Linux this reads ``/proc/self/smaps_rollup``; ``pss_mb`` splits shared
+    pages (e.g. mmapped checkpoint weights) evenly between the workers that map
+    them, so summing it across workers gives the real footprint. Elsewhere only
+    the peak RSS is available.
+    """
+    report: Dict[str, Any] = {"pid": os.getpid()}
+    try:
+        with open("/proc/self/smaps_rollup") as fh:
+            for line in fh:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == "kB":
+                    key = _SMAPS_FIELDS.get(parts[0].rstrip(":"))
+                    if key:
+                        report[key] = round(int(parts[1]) / 1024.0, 1)
+    except OSError:
+        report["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)
+    return report
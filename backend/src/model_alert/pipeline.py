@@ -0,0 +1,92 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+@dataclass
+class _StageItem:
+    value: Any
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class PipelineStage:
+    """
+    One stage of the request pipeline: a bounded queue in front of ``workers``
+    concurrent runs of ``fn``.
+
+    ``fn`` is a coroutine function that hands the actual work to a pool, so
+    stages run side by side: while one request is in the model, the next can
+    already be decoding. ``submit()`` waits while the queue is full, which
+    pushes back on the stage before it. ``stats()`` reports queue depth,
+    busy workers and occupancy (the fraction of worker time spent busy) for
+    tuning worker counts.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Awaitable[Any]], *, workers: int = 1, queue_size: int = 8):
+        self.name = name
+        self._fn = fn
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+
+        self._queue: asyncio.Queue | None = None
+        self._tasks: List[asyncio.Task] = []
+        self._started_at: float | None = None
+
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self._busy_total_s = 0.0
+        self._wait_total_s = 0.0
+
+    async def submit(self, value: Any) -> Any:
+        self._ensure_workers()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_StageItem(value=value, future=future))
+        return await future
+
+    def _ensure_workers(self) -> None:
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+        self._started_at = time.perf_counter()
+
+    async def _work(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item.future.done():
+                continue
+            started = time.perf_counter()
+            self._wait_total_s += started - item.enqueued_at
+            self.busy += 1
+            try:
+                result = await self._fn(item.value)
+            except Exception as exc:
+                self.failed += 1
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            else:
+                self.processed += 1
+                if not item.future.done():
+                    item.future.set_result(result)
+            finally:
+                self.busy -= 1
+                self._busy_total_s += time.perf_counter() - started
+
+    def stats(self) -> Dict[str, Any]:
+        handled = self.processed + self.failed
+        elapsed = time.perf_counter() - self._started_at if self._started_at is not None else 0.0
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "busy": self.busy,
+            "occupancy": round(self._busy_total_s / (elapsed * self.workers), 4) if elapsed else 0.0,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self._wait_total_s / handled * 1000.0, 3) if handled else 0.0,
+            "avg_service_ms": round(self._busy_total_s / handled * 1000.0, 3) if handled else 0.0,
+        }
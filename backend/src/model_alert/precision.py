@@ -0,0 +1,169 @@
+"""
+Reduced-precision CPU modes for ViolenceSwin3D.
+
+    fp32  full precision (default)
+    int8  dynamic INT8 quantization of the MLP and head Linear layers
+    bf16  bfloat16 autocast, on CPUs with native bf16 support (AVX512-BF16/AMX)
+
+Evaluate accuracy against speed on labelled clips. A directory named after a
+class (e.g. clips/violence/*.mp4) labels the clips in it; other clips only
+count towards agreement with fp32:
+
+    python -m src.model_alert.precision clips/ --checkpoint models/final_crime_detector.pth
+"""
+import argparse
+import gc
+import logging
+import os
+import statistics
+import time
+from typing import List, Tuple
+
+import torch
+from torch import nn
+from torchvision.models.video.swin_transformer import ShiftedWindowAttention3d
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("fp32", "int8", "bf16")
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+
+def bf16_supported() -> bool:
+    return torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported()
+
+
+def resolve_precision(precision: str) -> str:
+    """The precision that will actually run: bf16 falls back to fp32 on CPUs without bf16 support."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision {precision!r}; choose from {PRECISIONS}")
+    if precision == "bf16" and not bf16_supported():
+        logger.warning("This CPU has no native bf16 support; running fp32 instead")
+        return "fp32"
+    return precision
+
+
+def quantize_int8(model: nn.Module) -> nn.Module:
+    """
+    Dynamic INT8 quantization of the Linear layers in the Swin MLPs and the head.
+
+    Weights are stored as int8 and activations quantized per batch, so no
+    calibration data is needed. The attention qkv/proj layers stay fp32:
+    torchvision's window attention reads their ``.weight`` directly, which a
+    quantized Linear does not provide.
+    """
+    attention = {name for name, module in model.named_modules() if isinstance(module, ShiftedWindowAttention3d)}
+    linears = {
+        name
+        for name, module in model.named_modules()
+        if isinstance(module, nn.Linear) and name.rpartition(".")[0] not in attention
+    }
+    return torch.ao.quantization.quantize_dynamic(model, linears, dtype=torch.qint8)
+
+
+class Bf16Autocast:
+    """Run a model under CPU bf16 autocast, returning fp32 logits."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, clips: torch.Tensor) -> torch.Tensor:
+        with torch.autocast(device_type="cpu", dtype=torch.bfloat16):
+            return self.model(clips).float()
+
+
+def _find_clips(paths: List[str], labels: List[str]) -> List[Tuple[str, str | None]]:
+    clips = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in sorted(os.walk(path)):
+                label = os.path.basename(root)
+                for name in sorted(files):
+                    if name.lower().endswith(VIDEO_EXTENSIONS):
+                        clips.append((os.path.join(root, name), label if label in labels else None))
+        else:
+            label = os.path.basename(os.path.dirname(os.path.abspath(path)))
+            clips.append((path, label if label in labels else None))
+    return clips
+
+
+def _evaluate(runner, tensors: List[torch.Tensor], runs: int) -> Tuple[torch.Tensor, List[float]]:
+    with torch.no_grad():
+        runner(tensors[0])
+        latencies = []
+        probabilities = []
+        for tensor in tensors:
+            for _ in range(runs):
+                started = time.perf_counter()
+                logits = runner(tensor)
+                latencies.append(time.perf_counter() - started)
+            probabilities.append(torch.softmax(logits.float(), dim=1)[0])
+    return torch.stack(probabilities), latencies
+
+
+def main() -> None:
+    import json
+
+    from src.model_alert.backends import load_eager_model
+    from src.model_alert.extract_frames import extract_frames
+    from src.model_alert.preprocess import INPUT_SIZE, frames_to_tensor
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("clips", nargs="+", help="Clips, or directories of clips (labelled by class-named folders)")
+    parser.add_argument("--checkpoint", required=True, help="Checkpoint (.pth) or converted weights")
+    parser.add_argument("--modes", default="int8,bf16", help="Reduced-precision modes to compare with fp32")
+    parser.add_argument("--runs", type=int, default=2, help="Timed forward passes per clip")
+    args = parser.parse_args()
+
+    with open(os.path.join(os.path.dirname(__file__), "classes.json")) as fh:
+        raw = json.load(fh)
+    labels = [raw[key] for key in sorted(raw, key=int)] if isinstance(raw, dict) else list(raw)
+
+    clips = _find_clips(args.clips, labels)
+    if not clips:
+        parser.error("no clips found")
+    tensors = []
+    for path, _ in clips:
+        with open(path, "rb") as fh:
+            frames, _ = extract_frames(fh.read(), size=(INPUT_SIZE, INPUT_SIZE), min_duration_s=0, max_duration_s=1e9)
+        tensors.append(frames_to_tensor(frames))
+    targets = [labels.index(label) if label is not None else -1 for _, label in clips]
+    labelled = sum(target >= 0 for target in targets)
+
+    print(f"{len(clips)} clips ({labelled} labelled) x {args.runs} runs, {torch.get_num_threads()} intra-op threads")
+    print(f"bf16 supported on this CPU: {bf16_supported()}\n")
+    print(f"{'mode':6s} {'p50 ms':>8s} {'speedup':>8s} {'agree':>7s} {'accuracy':>9s} {'max |dp|':>9s}")
+
+    reference = None
+    baseline_ms = None
+    for mode in ["fp32"] + [m.strip() for m in args.modes.split(",") if m.strip() and m.strip() != "fp32"]:
+        if mode not in PRECISIONS:
+            parser.error(f"unknown mode {mode!r}; choose from {PRECISIONS}")
+        if mode == "bf16" and not bf16_supported():
+            print(f"{mode:6s} skipped: no native bf16 on this CPU")
+            continue
+
+        model = load_eager_model(args.checkpoint, len(labels))
+        runner = quantize_int8(model) if mode == "int8" else Bf16Autocast(model) if mode == "bf16" else model
+        probabilities, latencies = _evaluate(runner, tensors, args.runs)
+        runner = model = None
+        gc.collect()
+
+        p50_ms = statistics.median(latencies) * 1000
+        predictions = probabilities.argmax(dim=1)
+        if reference is None:
+            reference, baseline_ms = probabilities, p50_ms
+        agree = (predictions == reference.argmax(dim=1)).float().mean().item()
+        max_dp = (probabilities - reference).abs().max().item()
+        correct = sum(int(p == t) for p, t in zip(predictions.tolist(), targets) if t >= 0)
+        accuracy = f"{correct / labelled:9.1%}" if labelled else f"{'-':>9s}"
+        print(
+            f"{mode:6s} {p50_ms:8.1f} {baseline_ms / p50_ms:7.2f}x {agree:7.1%} {accuracy} {max_dp:9.4f}"
+        )
+        for (path, _), fp32_label, label in zip(clips, reference.argmax(dim=1).tolist(), predictions.tolist()):
+            if label != fp32_label:
+                print(f"       {path}: fp32 {labels[fp32_label]} -> {mode} {labels[label]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import asyncio
+import collections
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, BinaryIO, Dict, List, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def clip_cache_key(clip: BinaryIO | bytes, **params: Any) -> str:
+    """
+    Hash the clip bytes together with everything that affects the result
+    (sampling parameters, model version, ...). File objects are read in
+    chunks and rewound afterwards.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(clip, (bytes, bytearray, memoryview)):
+        digest.update(clip)
+    else:
+        clip.seek(0)
+        while chunk := clip.read(CHUNK_SIZE):
+            digest.update(chunk)
+        clip.seek(0)
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    LRU + TTL cache of detection results.
+
+    Entries expire ``ttl_s`` after they are stored; the least recently used
+    ones are evicted once there are more than ``max_entries`` or their
+    serialized size exceeds ``max_bytes``. With ``path`` set, entries are also
+    written to a SQLite file and read back on a memory miss, so the cache
+    survives restarts. ``put`` never touches the file: a writer thread stores
+    the queued entries with one commit per batch. ``get_async`` reads the file
+    in an executor, so the event loop only ever does the in-memory lookup.
+    """
+
+    def __init__(self, *, max_entries: int = 1024, max_bytes: int = 4 * 1024 * 1024, ttl_s: float = 600.0, path: str | None = None):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.path = path
+        self._lock = threading.Lock()
+        # key -> (expires_at, size, value); wall-clock expiry so it stays valid on disk
+        self._entries: collections.OrderedDict[str, tuple[float, int, Dict[str, Any]]] = collections.OrderedDict()
+        self._bytes = 0
+        self._db: sqlite3.Connection | None = None
+        # The connection is shared by the writer thread and disk reads
+        self._db_lock = threading.Lock()
+        # key -> (expires_at, encoded value) waiting for the writer
+        self._pending: Dict[str, Tuple[float, str]] = {}
+        self._wake = threading.Condition(self._lock)
+        self._closing = False
+        self._writer: threading.Thread | None = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)")
+            self._db.execute("DELETE FROM results WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+            self._writer = threading.Thread(target=self._write_behind, name="result-cache-writer", daemon=True)
+            self._writer.start()
+
+        self._puts = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.disk_writes = 0
+        self.disk_commits = 0
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        """Memory, then the SQLite file; blocks on disk, so not for the event loop (see ``get_async``)."""
+        found, value = self._get_memory(key)
+        if found:
+            return value
+        return self._get_disk(key)
+
+    async def get_async(self, key: str) -> Dict[str, Any] | None:
+        found, value = self._get_memory(key)
+        if found:
+            return value
+        if self._db is None:
+            return None
+        return await asyncio.get_running_loop().run_in_executor(None, self._get_disk, key)
+
+    def _get_memory(self, key: str) -> Tuple[bool, Dict[str, Any] | None]:
+        """(True, value) on a hit; (True, None) on a miss that needs no disk lookup."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, dict(entry[2])
+                self._remove(key)
+                self.expirations += 1
+            pending = self._pending.get(key)
+            if pending is not None and pending[0] >= now:
+                # Evicted from memory before the writer stored it
+                value = json.loads(pending[1])
+                self._insert(key, pending[0], value, len(pending[1]))
+                self.hits += 1
+                return True, dict(value)
+            if self._db is None:
+                self.misses += 1
+                return True, None
+        return False, None
+
+    def _get_disk(self, key: str) -> Dict[str, Any] | None:
+        with self._db_lock:
+            if self._db is None:
+                row = None
+            else:
+                row = self._db.execute("SELECT expires_at, value FROM results WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            if row is not None and row[0] >= time.time():
+                value = json.loads(row[1])
+                if key not in self._entries:
+                    self._insert(key, row[0], value, len(row[1]))
+                self.hits += 1
+                self.disk_hits += 1
+                return dict(value)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        encoded = json.dumps(value)
+        expires_at = time.time() + self.ttl_s
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._insert(key, expires_at, value, len(encoded))
+            if self._writer is not None:
+                self._pending[key] = (expires_at, encoded)
+                self._wake.notify()
+
+    def _write_behind(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending and not self._closing:
+                    self._wake.wait()
+                if not self._pending and self._closing:
+                    return
+                # Everything queued while the previous batch was committing goes in one transaction
+                batch: List[Tuple[str, float, str]] = [(key, *entry) for key, entry in self._pending.items()]
+                self._pending.clear()
+            with self._db_lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO results (key, expires_at, value) VALUES (?, ?, ?)", batch
+                )
+                self._puts += len(batch)
+                if self._puts >= 256:
+                    self._puts = 0
+                    self._db.execute("DELETE FROM results WHERE expires_at < ?", (time.time(),))
+                self._db.commit()
+            with self._lock:
+                self.disk_writes += len(batch)
+                self.disk_commits += 1
+
+    def _insert(self, key: str, expires_at: float, value: Dict[str, Any], size: int) -> None:
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or (self._bytes > self.max_bytes and len(self._entries) > 1):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def close(self) -> None:
+        """Store the queued entries, then close the file."""
+        if self._writer is not None:
+            with self._lock:
+                self._closing = True
+                self._wake.notify()
+            self._writer.join()
+            self._writer = None
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+            "persistent": self.path is not None,
+            "pending_writes": len(self._pending),
+            "disk_writes": self.disk_writes,
+            "disk_commits": self.disk_commits,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -1,20 +1,18 @@
 from src import models
-from fastapi import APIRouter, File, UploadFile, Depends, HTTPException
-from sqlalchemy.orm import Session
-from src.model_alert import service, crud, swin_model,schemas
-from db import SessionLocal
+from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.model_alert import alert_service, service, crud, swin_model,schemas
+from src.model_alert.executor import InferenceBusyError
+from src.model_alert.extract_frames import strategy_selector
+from src.model_alert.memory import process_memory
+from src.model_alert.model_manager import ModelNotReadyError, ReloadInProgressError
+from src.model_alert.upload import UploadTooLargeError
+from db import get_db, pool_stats
 
 router = APIRouter(prefix="/api/v1", tags=["model_alert"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/trigger-alert")
-async def trigger_alert(payload: schemas.TriggerAlertPayload, db: Session = Depends(get_db)):
+async def trigger_alert(payload: schemas.TriggerAlertPayload, db: AsyncSession = Depends(get_db)):
     try:
         result = await service.trigger_alert(payload, db)
         return result
@@ -36,11 +34,12 @@ async def trigger_alert(payload: schemas.TriggerAlertPayload, db: Session = Depe
 async def detect(
     video: UploadFile = File(...),
     camera_id: int = 1,
-    db: Session = Depends(get_db)
+    profile: str | None = None,
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         # ---- DEMO FIX ----
-        user = db.query(models.User).first()
+        user = await alert_service.get_recipient_async(db)
         if not user:
             demo_user = models.User(
                 username="demo_user",
@@ -49,17 +48,106 @@ async def detect(
                 fcm_token="demo_token"
             )
             db.add(demo_user)
-            db.commit()
-            db.refresh(demo_user)
+            await db.commit()
             user = demo_user
 
-        result = await service.detect(video, camera_id, db)
+        result = await service.detect(video, camera_id, db, profile)
         return result
 
+    except (InferenceBusyError, ModelNotReadyError) as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after_s)},
+        )
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
 
+@router.post("/timeline", status_code=202)
+async def submit_timeline(video: UploadFile = File(...)):
+    try:
+        job = await service.submit_timeline(video)
+    except ModelNotReadyError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after_s)},
+        )
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return job.summary(include_segments=False)
+
+
+@router.get("/timeline/{job_id}")
+async def timeline_status(job_id: str):
+    job = service.timeline_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Timeline job not found")
+    return job.summary()
+
+
 @router.get("/health")
 async def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def readiness_check(response: Response):
+    status = service.model_manager.status()
+    if not service.model_manager.ready:
+        response.status_code = 503
+        response.headers["Retry-After"] = str(service.model_manager.retry_after_s)
+    return status
+
+@router.get("/model")
+async def model_status():
+    return service.model_manager.status()
+
+@router.post("/model/reload", status_code=202)
+async def reload_model(payload: schemas.ModelReloadRequest | None = None):
+    try:
+        service.reload_model(payload.path if payload is not None else None)
+    except ModelNotReadyError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after_s)},
+        )
+    except ReloadInProgressError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return service.model_manager.status()
+
+@router.get("/metrics")
+async def metrics():
+    return {
+        "batching": service.batcher.stats(),
+        "executor": service.inference_executor.stats(),
+        "profiles": service.profile_router.stats(),
+        "pipeline": {
+            "decode": service.decode_stage.stats(),
+            "preprocess": service.preprocess_stage.stats(),
+        },
+        "decode": strategy_selector.stats(),
+        "model": service.model_manager.status(),
+        "memory": process_memory(),
+        "result_cache": service.result_cache.stats() if service.result_cache is not None else None,
+        "cascade": service.cascade.stats() if service.cascade is not None else None,
+        "incidents": service.incident_tracker.stats(),
+        "alerts": alert_service.stats(),
+        "lookup_cache": alert_service.lookup_cache.stats(),
+        "db_pool": pool_stats(),
+        "motion": {"detect": service.motion_gate.stats(), "streams": service.stream_motion_gate.stats()},
+        "streams": service.stream_engine.stats(),
+        "timeline": service.timeline_runner.stats(),
+    }
+
+
+@router.get("/streams")
+async def streams():
+    return service.stream_engine.stats()
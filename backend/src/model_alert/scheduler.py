@@ -0,0 +1,150 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict
+
+import numpy as np
+
+SCHEDULING_POLICIES = ("weighted", "round_robin")
+
+
+@dataclass
+class _CameraLane:
+    camera_id: int
+    weight: float
+    pending: tuple[np.ndarray, float] | None = None
+    in_flight: bool = False
+    # Stride scheduling: the lane with the lowest pass value runs next and
+    # advances by 1 / weight, so a weight-2 camera gets twice the turns.
+    pass_value: float = 0.0
+
+    registered_at: float = field(default_factory=time.monotonic)
+    offered: int = 0
+    analyzed: int = 0
+    dropped_superseded: int = 0
+    dropped_stale: int = 0
+    lag_total_s: float = 0.0
+    lag_max_s: float = 0.0
+    last_lag_s: float = 0.0
+
+
+class WindowScheduler:
+    """
+    Decide which camera's window runs next on the shared model.
+
+    Every camera has a single-slot mailbox: a new window replaces one that has
+    not been dispatched yet, and a window older than ``max_lag_s`` when its
+    turn comes is dropped, so a camera that falls behind sheds windows instead
+    of building a backlog. At most ``max_in_flight`` windows run at once (one
+    per camera), picked weighted-fair by camera weight, or round-robin with
+    ``policy="round_robin"``.
+    """
+
+    def __init__(
+        self,
+        run_window: Callable[[int, np.ndarray], Awaitable[None]],
+        *,
+        max_in_flight: int = 4,
+        max_lag_s: float = 10.0,
+        policy: str = "weighted",
+    ):
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unknown scheduling policy '{policy}'. Must be one of {list(SCHEDULING_POLICIES)}")
+        self._run_window = run_window
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_lag_s = max_lag_s
+        self.policy = policy
+        self._lanes: Dict[int, _CameraLane] = {}
+        self._in_flight = 0
+
+    def register(self, camera_id: int, weight: float = 1.0) -> None:
+        weight = max(weight, 1e-3) if self.policy == "weighted" else 1.0
+        lane = self._lanes.get(camera_id)
+        if lane is not None:
+            lane.weight = weight
+            return
+        # Start new cameras level with the others so they neither starve nor get a burst
+        start = min((lane.pass_value for lane in self._lanes.values()), default=0.0)
+        self._lanes[camera_id] = _CameraLane(camera_id=camera_id, weight=weight, pass_value=start)
+
+    def unregister(self, camera_id: int) -> None:
+        self._lanes.pop(camera_id, None)
+
+    def offer(self, camera_id: int, frames: np.ndarray, captured_at: float) -> None:
+        """Queue a window for ``camera_id``; must be called on the event loop thread."""
+        lane = self._lanes.get(camera_id)
+        if lane is None:
+            return
+        lane.offered += 1
+        if lane.pending is not None:
+            lane.dropped_superseded += 1
+        lane.pending = (frames, captured_at)
+        self._pump()
+
+    def _next_lane(self) -> _CameraLane | None:
+        now = time.monotonic()
+        while True:
+            ready = [lane for lane in self._lanes.values() if lane.pending is not None and not lane.in_flight]
+            if not ready:
+                return None
+            lane = min(ready, key=lambda lane: (lane.pass_value, lane.camera_id))
+            if now - lane.pending[1] > self.max_lag_s:
+                lane.pending = None
+                lane.dropped_stale += 1
+                continue
+            return lane
+
+    def _pump(self) -> None:
+        while self._in_flight < self.max_in_flight:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            frames, captured_at = lane.pending
+            lane.pending = None
+            lane.in_flight = True
+            lane.pass_value += 1.0 / lane.weight
+            self._in_flight += 1
+            asyncio.get_running_loop().create_task(self._run(lane, frames, captured_at))
+
+    async def _run(self, lane: _CameraLane, frames: np.ndarray, captured_at: float) -> None:
+        try:
+            await self._run_window(lane.camera_id, frames)
+        finally:
+            lag = time.monotonic() - captured_at
+            lane.analyzed += 1
+            lane.last_lag_s = lag
+            lane.lag_total_s += lag
+            lane.lag_max_s = max(lane.lag_max_s, lag)
+            lane.in_flight = False
+            self._in_flight -= 1
+            self._pump()
+
+    def camera_stats(self, camera_id: int, frames_per_window: int) -> Dict[str, Any]:
+        """
+        Scheduling stats for one camera. ``effective_analysis_fps`` counts the
+        new sampled frames covered by analysed windows per second.
+        """
+        lane = self._lanes.get(camera_id)
+        if lane is None:
+            return {}
+        dropped = lane.dropped_superseded + lane.dropped_stale
+        elapsed = max(time.monotonic() - lane.registered_at, 1e-6)
+        return {
+            "weight": lane.weight,
+            "windows_offered": lane.offered,
+            "windows_analyzed": lane.analyzed,
+            "windows_dropped": dropped,
+            "drop_rate": round(dropped / lane.offered, 4) if lane.offered else 0.0,
+            "lag_seconds": round(lane.last_lag_s, 3),
+            "avg_lag_seconds": round(lane.lag_total_s / lane.analyzed, 3) if lane.analyzed else 0.0,
+            "max_lag_seconds": round(lane.lag_max_s, 3),
+            "effective_analysis_fps": round(lane.analyzed * frames_per_window / elapsed, 3),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "max_lag_s": self.max_lag_s,
+        }
@@ -16,4 +16,14 @@ class DetectResponse(BaseModel):
     alert_type: str
     confidence: float
     clip_duration_seconds: float
-    alert_status: str
\ No newline at end of file
+    alert_status: str
+    decode_strategy: Optional[str] = None
+    decode_time_seconds: Optional[float] = None
+    motion_score: Optional[float] = None
+    motion_gated: bool = False
+    cached: bool = False
+    profile: Optional[str] = None
+    model_version: Optional[str] = None
+
+class ModelReloadRequest(BaseModel):
+    path: Optional[str] = Field(None, description="Checkpoint or artifact to load; defaults to the current file")
\ No newline at end of file
@@ -1,17 +1,32 @@
+import asyncio
 import torch
 import torch.nn.functional as F
-import numpy as np
 import os
 import json
+import logging
+import time
 from fastapi import UploadFile
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import src.model_alert.alert_service as alert_service
-from src.model_alert.extract_frames import extract_frames
-from src.model_alert.swin_model import ViolenceSwin3D
+from src.model_alert import crud
+from src.model_alert.batching import MicroBatcher
+from src.model_alert.cascade import ScreeningCascade
+from src.model_alert.config import settings
+from src.model_alert.executor import InferenceExecutor
+from src.model_alert.incidents import ALERT_TYPES, IncidentTracker
+from src.model_alert.model_manager import ModelManager, ModelNotReadyError
+from src.model_alert.motion import MotionGate
+from src.model_alert.pipeline import PipelineStage
+from src.model_alert.preprocess import decode_clip, prepare_clip, preprocess_frames
+from src.model_alert.profiles import ProfileRouter, parse_camera_profiles, parse_profiles
+from src.model_alert.result_cache import ResultCache, clip_cache_key
 from src.model_alert.schemas import TriggerAlertPayload
+from src.model_alert.streams import StreamIngestionEngine
+from src.model_alert.timeline import TimelineJob, TimelineRunner
+from src.model_alert.upload import open_clip_upload, save_upload
+from db import SessionLocal
 
-NORM_MEAN = np.array([0.485, 0.456, 0.406]).astype(np.float32)
-NORM_STD = np.array([0.229, 0.224, 0.225]).astype(np.float32)
+logger = logging.getLogger(__name__)
 
 # Load classes
 _classes_path = os.path.join(os.path.dirname(__file__), "classes.json")
@@ -23,18 +38,100 @@ else:
 
 device = "cuda" if torch.cuda.is_available() else "cpu"
 
-# Load model
-model = ViolenceSwin3D(num_classes=len(CLASSES)).to(device)
 CHECKPOINT_FILE = "final_crime_detector.pth"
 _project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-_checkpoint_path = os.path.join(_project_root, "models", CHECKPOINT_FILE)
-checkpoint = torch.load(_checkpoint_path, map_location=device)
-if isinstance(checkpoint, dict) and "model_state" in checkpoint:
-    state_dict = checkpoint["model_state"]
-else:
-    state_dict = checkpoint
-model.load_state_dict(state_dict, strict=False)
-model.eval()
+_checkpoint_path = settings.MODEL_CHECKPOINT_PATH or os.path.join(_project_root, "models", CHECKPOINT_FILE)
+
+profile_router = ProfileRouter(
+    parse_profiles(settings.INFERENCE_PROFILES),
+    default=settings.INFERENCE_DEFAULT_PROFILE,
+    cameras=parse_camera_profiles(settings.INFERENCE_CAMERA_PROFILES),
+)
+
+model_manager = ModelManager(
+    checkpoint_path=_checkpoint_path,
+    num_classes=len(CLASSES),
+    device=device,
+    input_shapes=profile_router.shapes,
+    warmup_runs=settings.MODEL_WARMUP_RUNS,
+    mmap=settings.MODEL_MMAP,
+    snapshot_dir=settings.MODEL_SNAPSHOT_DIR,
+    backend=settings.MODEL_BACKEND,
+    artifact_path=settings.MODEL_ARTIFACT_PATH,
+    precision=settings.MODEL_PRECISION,
+    retry_after_s=settings.INFERENCE_RETRY_AFTER_S,
+)
+
+inference_executor = InferenceExecutor(
+    kind=settings.INFERENCE_EXECUTOR,
+    max_workers=settings.INFERENCE_WORKERS,
+    max_pending=settings.INFERENCE_QUEUE_SIZE,
+    retry_after_s=settings.INFERENCE_RETRY_AFTER_S,
+    preprocess_workers=settings.PREPROCESS_WORKERS,
+)
+
+batcher = MicroBatcher(
+    model_manager.forward,
+    max_batch_size=settings.MAX_BATCH_SIZE,
+    max_wait_ms=settings.MAX_BATCH_WAIT_MS,
+    executor=inference_executor.model_pool,
+)
+
+async def _decode(item):
+    clip, profile = item
+    return await inference_executor.run(
+        decode_clip,
+        clip,
+        num_frames=profile.num_frames,
+        size=profile.size,
+        min_duration_s=5.0,
+        max_duration_s=10.0,
+        strategy=settings.DECODE_STRATEGY,
+        backend=settings.DECODE_BACKEND,
+    )
+
+
+async def _preprocess(frames):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor.preprocess_pool, preprocess_frames, frames)
+
+
+# Inference is the third stage: the micro-batcher in front of the model thread
+decode_stage = PipelineStage(
+    "decode", _decode, workers=settings.INFERENCE_WORKERS, queue_size=settings.PIPELINE_QUEUE_SIZE
+)
+preprocess_stage = PipelineStage(
+    "preprocess", _preprocess, workers=settings.PREPROCESS_WORKERS, queue_size=settings.PIPELINE_QUEUE_SIZE
+)
+
+result_cache = None
+if settings.RESULT_CACHE_ENABLED:
+    result_cache = ResultCache(
+        max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+        max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+        ttl_s=settings.RESULT_CACHE_TTL_S,
+        path=settings.RESULT_CACHE_PATH,
+    )
+
+cascade = None
+if settings.CASCADE_SCREENER_PATH:
+    cascade = ScreeningCascade(
+        settings.CASCADE_SCREENER_PATH,
+        threshold=settings.CASCADE_THRESHOLD,
+        audit_rate=settings.CASCADE_AUDIT_RATE,
+    )
+
+incident_tracker = IncidentTracker(
+    alpha=settings.INCIDENT_EMA_ALPHA,
+    open_threshold=settings.INCIDENT_OPEN_THRESHOLD,
+    close_threshold=settings.INCIDENT_CLOSE_THRESHOLD,
+    cooldown_s=settings.INCIDENT_COOLDOWN_S,
+    max_cameras=settings.INCIDENT_MAX_CAMERAS,
+)
+
+motion_gate = MotionGate(settings.MOTION_THRESHOLD)
+stream_motion_gate = MotionGate(settings.MOTION_THRESHOLD)
+
 
 PREDICTION_TO_ALERT_MAP = {
     "violence": "violence",
@@ -45,13 +142,221 @@ PREDICTION_TO_ALERT_MAP = {
     "burglary": "theft",
 }
 
-async def trigger_alert(payload: TriggerAlertPayload, db: Session):
+
+async def classify(clip: torch.Tensor) -> tuple[str, str, float, str]:
+    """Classify one preprocessed clip: (label, alert type, confidence, model version)."""
+    if cascade is not None:
+        return await cascade.classify(clip, _classify_full)
+    return await _classify_full(clip)
+
+
+async def _classify_full(clip: torch.Tensor) -> tuple[str, str, float, str]:
+    if not model_manager.ready:
+        raise ModelNotReadyError(model_manager.state, model_manager.retry_after_s)
+
+    logits, version = await batcher.submit(clip)
+    probs = F.softmax(logits, dim=1)
+    conf, pred = torch.max(probs, dim=1)
+
+    predicted_label = CLASSES[int(pred.item())]
+    return predicted_label, PREDICTION_TO_ALERT_MAP.get(predicted_label, "normal"), float(conf.item()), version
+
+
+def _parse_status_weights(spec: str) -> dict[str, float]:
+    weights = {}
+    for item in spec.split(","):
+        status, _, weight = item.partition("=")
+        if status.strip():
+            weights[status.strip()] = float(weight or 1.0)
+    return weights
+
+
+STREAM_STATUS_WEIGHTS = _parse_status_weights(settings.STREAM_STATUS_WEIGHTS)
+
+
+def _load_stream_cameras() -> list[tuple[int, str, str]]:
+    db = SessionLocal()
+    try:
+        cameras = crud.get_cameras_by_status(db, list(STREAM_STATUS_WEIGHTS))
+        return [(camera.camera_id, camera.stream_url, camera.status) for camera in cameras]
+    finally:
+        db.close()
+
+
+def _no_alert_status(incident, alert_type: str) -> str:
+    if incident is not None:
+        return f"Ongoing {incident.event_type} incident (alert {incident.alert_id} already sent)"
+    if alert_type in ALERT_TYPES:
+        return "Below alert threshold (No alert sent)"
+    return "Normal behavior detected (No alert sent)"
+
+
+def record_detection(camera_id: int, alert_type: str, confidence: float) -> str:
+    """
+    Feed one prediction to the camera's incident tracker and apply its decision:
+    create and push an alert for a new incident, raise the stored confidence of
+    the open one, or do nothing. Returns the alert status for the response.
+    Runs in worker threads (stream ingestion); a session is only opened when
+    the DB is touched.
+    """
+    action, incident = incident_tracker.observe(camera_id, alert_type, confidence)
+    if action == "none":
+        return _no_alert_status(incident, alert_type)
+
+    db = SessionLocal()
+    try:
+        if action == "open":
+            try:
+                alert = alert_service.create_and_send_alert(
+                    db,
+                    camera_id=camera_id,
+                    event_type=alert_type,
+                    confidence=confidence,
+                    media_urls=[],
+                    media_type="video",
+                )
+            except Exception:
+                incident_tracker.abandon(incident)
+                raise
+            incident.alert_id = alert.alert_id
+            return alert.status
+
+        if incident.alert_id is not None:
+            crud.update_alert_confidence(db, incident.alert_id, incident.max_confidence)
+        return f"Ongoing {incident.event_type} incident (alert {incident.alert_id} updated)"
+    finally:
+        db.close()
+
+
+async def record_detection_async(camera_id: int, alert_type: str, confidence: float, db: AsyncSession) -> str:
+    """``record_detection`` for request handlers, on the request's AsyncSession."""
+    action, incident = incident_tracker.observe(camera_id, alert_type, confidence)
+    if action == "none":
+        return _no_alert_status(incident, alert_type)
+
+    if action == "open":
+        try:
+            alert = await alert_service.create_and_send_alert_async(
+                db,
+                camera_id=camera_id,
+                event_type=alert_type,
+                confidence=confidence,
+                media_urls=[],
+                media_type="video",
+            )
+        except Exception:
+            incident_tracker.abandon(incident)
+            raise
+        incident.alert_id = alert.alert_id
+        return alert.status
+
+    if incident.alert_id is not None:
+        await crud.update_alert_confidence_async(db, incident.alert_id, incident.max_confidence)
+    return f"Ongoing {incident.event_type} incident (alert {incident.alert_id} updated)"
+
+
+stream_engine = StreamIngestionEngine(
+    load_cameras=_load_stream_cameras,
+    classify=classify,
+    preprocess=preprocess_stage.submit,
+    on_result=record_detection,
+    window=settings.STREAM_WINDOW_FRAMES,
+    stride=settings.STREAM_WINDOW_STRIDE,
+    sample_fps=settings.STREAM_SAMPLE_FPS,
+    refresh_s=settings.STREAM_REFRESH_S,
+    reconnect_s=settings.STREAM_RECONNECT_S,
+    loop_files=settings.STREAM_LOOP_FILES,
+    status_weights=STREAM_STATUS_WEIGHTS,
+    max_in_flight=settings.STREAM_MAX_IN_FLIGHT,
+    max_lag_s=settings.STREAM_MAX_LAG_S,
+    policy=settings.STREAM_SCHEDULING,
+    motion_gate=stream_motion_gate,
+    profile_for=profile_router.camera_profile,
+)
+
+timeline_runner = TimelineRunner(
+    classify,
+    preprocess=preprocess_stage.submit,
+    window=settings.STREAM_WINDOW_FRAMES,
+    stride=settings.TIMELINE_WINDOW_STRIDE,
+    sample_fps=settings.TIMELINE_SAMPLE_FPS,
+    batch_size=settings.TIMELINE_BATCH_SIZE,
+    concurrency=settings.TIMELINE_CONCURRENCY,
+    max_jobs=settings.TIMELINE_MAX_JOBS,
+)
+
+
+async def submit_timeline(video: UploadFile) -> TimelineJob:
+    if not model_manager.ready:
+        raise ModelNotReadyError(model_manager.state, model_manager.retry_after_s)
+    path = await save_upload(video, max_bytes=settings.TIMELINE_MAX_UPLOAD_BYTES)
+    return timeline_runner.submit(path, video.filename or "video")
+
+
+_watch_task: asyncio.Task | None = None
+
+
+def _load_canary(path: str) -> None:
+    profile = profile_router.profiles[profile_router.default]
+    try:
+        with open(path, "rb") as fh:
+            clip, _, _ = prepare_clip(
+                fh.read(),
+                num_frames=profile.num_frames,
+                size=profile.size,
+                min_duration_s=0,
+                max_duration_s=1e9,
+                backend=settings.DECODE_BACKEND,
+            )
+    except Exception:
+        logger.exception("Could not load canary clip %s; reloads are checked on a synthetic clip", path)
+        return
+    model_manager.canary = clip
+
+
+def reload_model(path: str | None = None) -> None:
+    """Hot-swap the model; ``path`` must sit next to the file currently being served."""
+    if path is not None:
+        allowed = os.path.dirname(os.path.realpath(model_manager.source_path))
+        if os.path.dirname(os.path.realpath(path)) != allowed:
+            raise ValueError(f"Model files can only be loaded from {allowed}")
+        if not os.path.isfile(path):
+            raise ValueError(f"Model file not found: {path}")
+    model_manager.start_reload(path)
+
+
+def startup() -> None:
+    global _watch_task
+    model_manager.start(inference_executor.model_pool)
+    if settings.MODEL_CANARY_CLIP:
+        inference_executor.preprocess_pool.submit(_load_canary, settings.MODEL_CANARY_CLIP)
+    if settings.MODEL_WATCH_INTERVAL_S > 0:
+        _watch_task = asyncio.get_running_loop().create_task(model_manager.watch(settings.MODEL_WATCH_INTERVAL_S))
+    if cascade is not None:
+        cascade.start()
+    if settings.STREAM_INGESTION_ENABLED:
+        stream_engine.start()
+
+
+def shutdown() -> None:
+    if _watch_task is not None:
+        _watch_task.cancel()
+    stream_engine.stop()
+    if result_cache is not None:
+        result_cache.close()
+    if cascade is not None:
+        cascade.shutdown()
+    inference_executor.shutdown()
+    alert_service.shutdown()
+
+
+async def trigger_alert(payload: TriggerAlertPayload, db: AsyncSession):
     valid_types = {"theft", "violence", "manual_report", "normal"}
     if payload.event_type not in valid_types:
         raise ValueError(f"Invalid event_type. Must be one of {sorted(valid_types)}")
     
     if payload.event_type in {"theft", "violence", "manual_report"}:
-        alert = alert_service.create_and_send_alert(
+        alert = await alert_service.create_and_send_alert_async(
             db,
             camera_id=payload.camera_id,
             event_type=payload.event_type,
@@ -63,65 +368,69 @@ async def trigger_alert(payload: TriggerAlertPayload, db: Session):
     
     return {"status": "No alert triggered (Normal behavior detected)"}
 
-async def detect(video: UploadFile, camera_id: int, db: Session):
-    video_bytes = await video.read()
+async def detect(video: UploadFile, camera_id: int, db: AsyncSession, profile: str | None = None):
+    if not model_manager.ready:
+        raise ModelNotReadyError(model_manager.state, model_manager.retry_after_s)
+    inference_profile = profile_router.resolve(camera_id, profile)
 
-    frames, duration = extract_frames(
-        video_bytes,
-        num_frames=16,
+    clip = await open_clip_upload(
+        video,
+        max_bytes=settings.MAX_UPLOAD_BYTES,
+        probe_bytes=settings.UPLOAD_PROBE_BYTES,
         min_duration_s=5.0,
         max_duration_s=10.0,
+        backend=settings.DECODE_BACKEND,
     )
 
-    frames = torch.tensor(frames, dtype=torch.float32)
-    frames = frames.permute(0, 3, 1, 2) / 255.0
-    frames = frames.unsqueeze(0)
-    frames = frames.permute(0, 2, 1, 3, 4)
-    
-    _, C, T, H, W = frames.shape
-    frames = torch.nn.functional.interpolate(
-        frames,
-        size=(T, 224, 224),
-        mode="trilinear",
-        align_corners=False,
-    )
-    
-    mean_tensor = torch.tensor(NORM_MEAN).reshape(1, 3, 1, 1, 1).to(frames.device)
-    std_tensor = torch.tensor(NORM_STD).reshape(1, 3, 1, 1, 1).to(frames.device)
-    frames = (frames - mean_tensor) / std_tensor
-
-    frames = frames.to(device)
+    # Retried uploads of the same clip are answered from the cache without taking a slot
+    cache_key = None
+    if result_cache is not None:
+        cache_key = await asyncio.to_thread(
+            clip_cache_key,
+            clip,
+            num_frames=inference_profile.num_frames,
+            size=inference_profile.size,
+            min_duration_s=5.0,
+            max_duration_s=10.0,
+            strategy=settings.DECODE_STRATEGY,
+            model_version=model_manager.version,
+            cascade_threshold=cascade.threshold if cascade is not None else None,
+            motion_threshold=settings.MOTION_THRESHOLD,
+        )
+        cached = await result_cache.get_async(cache_key)
+        if cached is not None:
+            return {**cached, "alert_status": "Duplicate clip: cached result returned (no new alert)", "cached": True}
 
-    with torch.no_grad():
-        if device == "cuda":
-            with torch.amp.autocast(device_type="cuda"):
-                logits = model(frames)
+    async with inference_executor.slot():
+        started = time.perf_counter()
+        if inference_executor.kind == "process":
+            # File objects don't cross process boundaries
+            clip = clip.read()
+        frames, duration, decode_stats = await decode_stage.submit((clip, inference_profile))
+        clip_tensor, decode_stats["motion_score"] = await preprocess_stage.submit(frames)
+        motion_gated = motion_gate.skip(decode_stats["motion_score"])
+        if motion_gated:
+            # Static scene: skip the forward pass entirely
+            predicted_label, alert_event_type, confidence, model_version = "normal", "normal", 1.0, None
         else:
-            logits = model(frames)
+            predicted_label, alert_event_type, confidence, model_version = await classify(clip_tensor)
+        profile_router.record(inference_profile, time.perf_counter() - started)
 
-        probs = F.softmax(logits, dim=1)
-        conf, pred = torch.max(probs, dim=1)
-        
-    predicted_label = CLASSES[int(pred.item())]
-    confidence = float(conf.item())
-    alert_event_type = PREDICTION_TO_ALERT_MAP.get(predicted_label, "normal")
-    
-    if alert_event_type in {"theft", "violence"}:
-        alert_payload = TriggerAlertPayload(
-            camera_id=camera_id,
-            event_type=alert_event_type,
-            confidence=confidence,
-            media_urls=[],
-        )
-        alert_response = await trigger_alert(alert_payload, db)
-        alert_status = alert_response.get("status", "Alert Sent")
-    else:
-        alert_status = "Normal behavior detected (No alert sent)"
+    alert_status = await record_detection_async(camera_id, alert_event_type, confidence, db)
 
-    return {
+    result = {
         "prediction": predicted_label,
         "alert_type": alert_event_type,
         "confidence": confidence,
         "clip_duration_seconds": round(float(duration), 2),
         "alert_status": alert_status,
-    }
\ No newline at end of file
+        "decode_strategy": decode_stats.get("strategy"),
+        "decode_time_seconds": round(decode_stats.get("decode_seconds", 0.0), 4),
+        "motion_score": round(decode_stats["motion_score"], 4),
+        "motion_gated": motion_gated,
+        "profile": inference_profile.name,
+        "model_version": model_version,
+    }
+    if result_cache is not None:
+        result_cache.put(cache_key, result)
+    return result
\ No newline at end of file
@@ -0,0 +1,314 @@
+import asyncio
+import collections
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import cv2
+import numpy as np
+import torch
+
+from src.model_alert.motion import MotionGate
+from src.model_alert.preprocess import INPUT_SIZE
+from src.model_alert.profiles import InferenceProfile
+from src.model_alert.scheduler import WindowScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class CameraStream:
+    """
+    Reader thread for one camera.
+
+    Decodes ``stream_url`` (RTSP/HTTP URL or a local file), keeps every frame
+    that falls on the ``sample_fps`` grid as a downsampled RGB frame in a ring
+    buffer of ``window`` frames, and hands a snapshot of the buffer to
+    ``on_window`` every ``stride`` sampled frames. Local files are paced at
+    their native frame rate so they behave like a live source.
+    """
+
+    def __init__(
+        self,
+        camera_id: int,
+        stream_url: str,
+        on_window: Callable[["CameraStream", np.ndarray, float], None],
+        *,
+        window: int = 16,
+        stride: int = 8,
+        sample_fps: float = 2.0,
+        size: int = INPUT_SIZE,
+        reconnect_s: float = 5.0,
+        loop_files: bool = False,
+    ):
+        self.camera_id = camera_id
+        self.stream_url = stream_url
+        self._on_window = on_window
+        self.window = window
+        self.stride = max(1, stride)
+        self.sample_fps = sample_fps
+        self.size = size
+        self.reconnect_s = reconnect_s
+        self.is_file = os.path.exists(stream_url)
+        self.loop_files = loop_files
+
+        self._buffer: collections.deque = collections.deque(maxlen=window)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"camera-{camera_id}", daemon=True)
+
+        self.state = "starting"
+        self.frames_read = 0
+        self.frames_sampled = 0
+        self.windows_emitted = 0
+        self.reconnects = 0
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            cap = cv2.VideoCapture(self.stream_url)
+            if not cap.isOpened():
+                cap.release()
+                self.state = "reconnecting"
+                self.reconnects += 1
+                self._stop.wait(self.reconnect_s)
+                continue
+
+            self.state = "streaming"
+            try:
+                self._read(cap)
+            except Exception:
+                logger.exception("Camera %s stream failed", self.camera_id)
+            finally:
+                cap.release()
+
+            if self.is_file and not self.loop_files:
+                self.state = "finished"
+                return
+            if not self._stop.is_set():
+                self.state = "reconnecting"
+                self.reconnects += 1
+                self._stop.wait(0.0 if self.is_file else self.reconnect_s)
+
+        self.state = "stopped"
+
+    def _read(self, cap) -> None:
+        fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0) or 25.0
+        step = max(1, int(round(fps / self.sample_fps)))
+        frame_interval = 1.0 / fps if self.is_file else 0.0
+        next_frame_at = time.monotonic()
+        index = 0
+        since_window = 0
+
+        while not self._stop.is_set():
+            # grab() every frame to stay live; only sampled frames are decoded to pixels
+            if not cap.grab():
+                return
+            self.frames_read += 1
+
+            if index % step == 0:
+                ok, frame = cap.retrieve()
+                captured_at = time.monotonic()
+                if ok:
+                    small = cv2.resize(frame, (self.size, self.size), interpolation=cv2.INTER_LINEAR)
+                    cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=small)
+                    self._buffer.append(small)
+                    self.frames_sampled += 1
+                    since_window += 1
+                    if len(self._buffer) == self.window and since_window >= self.stride:
+                        since_window = 0
+                        self.windows_emitted += 1
+                        self._on_window(self, np.stack(self._buffer), captured_at)
+            index += 1
+
+            if frame_interval:
+                next_frame_at += frame_interval
+                delay = next_frame_at - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "camera_id": self.camera_id,
+            "state": self.state,
+            "frames_read": self.frames_read,
+            "frames_sampled": self.frames_sampled,
+            "windows_emitted": self.windows_emitted,
+            "reconnects": self.reconnects,
+        }
+
+
+class StreamIngestionEngine:
+    """
+    Run sliding-window detection on every active camera's live stream.
+
+    The engine keeps one ``CameraStream`` per camera returned by
+    ``load_cameras`` (re-read every ``refresh_s``). Emitted windows go through
+    a ``WindowScheduler``, which shares the model fairly between cameras
+    (weighted by ``status_weights[camera.status]``) and drops windows of
+    cameras that fall behind. Each scheduled window is turned into the model
+    input and its motion score by ``preprocess`` (off the event loop, e.g. the
+    preprocess stage ``/detect`` uses) and classified with ``classify``,
+    sharing the micro-batcher with ``/detect``, unless ``motion_gate`` finds
+    the window static. Every result is
+    passed to ``on_result`` in a worker thread, which decides on alerts.
+    Cameras for which ``profile_for`` returns an inference profile use its
+    frame count as the window and its input size.
+    """
+
+    def __init__(
+        self,
+        *,
+        load_cameras: Callable[[], List[Tuple[int, str, str]]],
+        classify: Callable[[torch.Tensor], Awaitable[Tuple[str, str, float, str]]],
+        preprocess: Callable[[np.ndarray], Awaitable[Tuple[torch.Tensor, float]]],
+        on_result: Callable[[int, str, float], None],
+        window: int = 16,
+        stride: int = 8,
+        sample_fps: float = 2.0,
+        refresh_s: float = 30.0,
+        reconnect_s: float = 5.0,
+        loop_files: bool = False,
+        status_weights: Dict[str, float] | None = None,
+        max_in_flight: int = 4,
+        max_lag_s: float | None = None,
+        policy: str = "weighted",
+        motion_gate: MotionGate | None = None,
+        profile_for: Callable[[int], InferenceProfile | None] | None = None,
+    ):
+        self._load_cameras = load_cameras
+        self._classify = classify
+        self._preprocess = preprocess
+        self._on_result = on_result
+        self.window = window
+        self.stride = stride
+        self.sample_fps = sample_fps
+        self.refresh_s = refresh_s
+        self.reconnect_s = reconnect_s
+        self.loop_files = loop_files
+        self.status_weights = status_weights or {}
+        self._motion_gate = motion_gate
+        self._profile_for = profile_for
+        # By default a window may wait two strides before it is considered stale
+        if max_lag_s is None:
+            max_lag_s = 2.0 * stride / sample_fps
+        self.scheduler = WindowScheduler(
+            self._analyze, max_in_flight=max_in_flight, max_lag_s=max_lag_s, policy=policy
+        )
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self._streams: Dict[int, CameraStream] = {}
+        self._results: Dict[int, Dict[str, Any]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._refresh_task is not None and not self._refresh_task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._refresh_task = self._loop.create_task(self._refresh_forever())
+
+    def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        for stream in self._streams.values():
+            stream.stop()
+        for camera_id, stream in self._streams.items():
+            stream.join(timeout=2.0)
+            self.scheduler.unregister(camera_id)
+        self._streams.clear()
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            try:
+                cameras = await self._loop.run_in_executor(None, self._load_cameras)
+                self._sync({camera_id: (url, status) for camera_id, url, status in cameras})
+            except Exception:
+                logger.exception("Failed to refresh camera list")
+            await asyncio.sleep(self.refresh_s)
+
+    def _sync(self, cameras: Dict[int, Tuple[str, str]]) -> None:
+        for camera_id in list(self._streams):
+            stream = self._streams[camera_id]
+            if cameras.get(camera_id, (None,))[0] != stream.stream_url:
+                stream.stop()
+                del self._streams[camera_id]
+                self.scheduler.unregister(camera_id)
+
+        for camera_id, (stream_url, status) in cameras.items():
+            if not stream_url:
+                continue
+            self.scheduler.register(camera_id, self.status_weights.get(status, 1.0))
+            if camera_id in self._streams:
+                continue
+            profile = self._profile_for(camera_id) if self._profile_for is not None else None
+            stream = CameraStream(
+                camera_id,
+                stream_url,
+                self._submit_window,
+                window=profile.num_frames if profile is not None else self.window,
+                stride=self.stride,
+                sample_fps=self.sample_fps,
+                size=profile.size if profile is not None else INPUT_SIZE,
+                reconnect_s=self.reconnect_s,
+                loop_files=self.loop_files,
+            )
+            self._streams[camera_id] = stream
+            self._results.setdefault(camera_id, {"detections": 0, "motion_skipped": 0})
+            self._results[camera_id]["profile"] = profile.name if profile is not None else None
+            stream.start()
+
+    def _submit_window(self, stream: CameraStream, frames: np.ndarray, captured_at: float) -> None:
+        # Called from the camera's reader thread
+        self._loop.call_soon_threadsafe(self.scheduler.offer, stream.camera_id, frames, captured_at)
+
+    async def _analyze(self, camera_id: int, frames: np.ndarray) -> None:
+        result = self._results[camera_id]
+        try:
+            clip, motion = await self._preprocess(frames)
+            if self._motion_gate is not None and self._motion_gate.skip(motion):
+                result["motion_skipped"] += 1
+                label, alert_type, confidence, model_version = "normal", "normal", 1.0, None
+            else:
+                label, alert_type, confidence, model_version = await self._classify(clip)
+            result["last_prediction"] = label
+            result["last_confidence"] = round(confidence, 4)
+            if model_version is not None:
+                result["last_model_version"] = model_version
+            result["last_analyzed_at"] = time.time()
+            result.pop("last_error", None)
+            if alert_type != "normal":
+                result["detections"] += 1
+            await self._loop.run_in_executor(None, self._on_result, camera_id, alert_type, confidence)
+        except Exception as exc:
+            result["last_error"] = str(exc)
+            logger.warning("Camera %s window failed: %s", camera_id, exc)
+
+    def stats(self) -> Dict[str, Any]:
+        cameras = {}
+        for camera_id, stream in self._streams.items():
+            cameras[camera_id] = {
+                **stream.stats(),
+                **self.scheduler.camera_stats(camera_id, self.stride),
+                **self._results.get(camera_id, {}),
+            }
+        return {
+            "running": self.running,
+            "window": self.window,
+            "stride": self.stride,
+            "sample_fps": self.sample_fps,
+            "scheduler": self.scheduler.stats(),
+            "cameras": cameras,
+        }
@@ -0,0 +1,286 @@
+import asyncio
+import collections
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Tuple
+
+import cv2
+import numpy as np
+import torch
+
+from src.model_alert.preprocess import INPUT_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class VideoWindows:
+    """
+    Overlapping fixed-length windows over a video file, decoded in one pass.
+
+    Frames are sampled at ``sample_fps`` and downscaled to ``size`` as they
+    are decoded; only the last ``window`` of them are kept, and every
+    ``stride`` sampled frames ``(start_s, end_s, frames)`` is yielded. Memory
+    is one window regardless of video length. A video shorter than one window
+    yields a single window padded with its last frame.
+    """
+
+    def __init__(self, path: str, *, window: int = 16, stride: int = 8, sample_fps: float = 2.0, size: int = INPUT_SIZE):
+        self.path = path
+        self.window = window
+        self.stride = max(1, stride)
+        self.sample_fps = sample_fps
+        self.size = size
+
+        cap = cv2.VideoCapture(path)
+        try:
+            self.fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        finally:
+            cap.release()
+        if self.fps <= 0.0 or total <= 0:
+            raise ValueError("Invalid video: unable to determine FPS or frame count.")
+        self.duration_s = total / self.fps
+
+    def __iter__(self) -> Iterator[Tuple[float, float, np.ndarray]]:
+        step = max(1, int(round(self.fps / self.sample_fps)))
+        frame_s = step / self.fps
+        buffer: collections.deque = collections.deque(maxlen=self.window)
+        since_window = 0
+        index = 0
+
+        cap = cv2.VideoCapture(self.path)
+        try:
+            while cap.grab():
+                if index % step == 0:
+                    ok, frame = cap.retrieve()
+                    if ok:
+                        small = cv2.resize(frame, (self.size, self.size), interpolation=cv2.INTER_LINEAR)
+                        cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=small)
+                        buffer.append((index / self.fps, small))
+                        since_window += 1
+                        if len(buffer) == self.window and since_window >= self.stride:
+                            since_window = 0
+                            yield self._window(buffer, frame_s)
+                index += 1
+        finally:
+            cap.release()
+
+        # Tail: frames sampled since the last window, or a video shorter than one window
+        if buffer and since_window > 0:
+            yield self._window(buffer, frame_s)
+
+    def _window(self, buffer, frame_s: float) -> Tuple[float, float, np.ndarray]:
+        frames = [frame for _, frame in buffer]
+        frames += [frames[-1]] * (self.window - len(frames))
+        return buffer[0][0], min(buffer[-1][0] + frame_s, self.duration_s), np.stack(frames)
+
+
+@dataclass
+class TimelineJob:
+    job_id: str
+    filename: str
+    status: str = "queued"
+    duration_s: float | None = None
+    processed_s: float = 0.0
+    segments: List[Dict[str, Any]] = field(default_factory=list)
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Consecutive non-normal segments of the same alert type merged into one."""
+        events: List[Dict[str, Any]] = []
+        for segment in self.segments:
+            if segment["alert_type"] == "normal":
+                continue
+            last = events[-1] if events else None
+            if last is not None and last["alert_type"] == segment["alert_type"] and segment["start_s"] <= last["end_s"]:
+                last["end_s"] = segment["end_s"]
+                last["max_confidence"] = max(last["max_confidence"], segment["confidence"])
+            else:
+                events.append(
+                    {
+                        "alert_type": segment["alert_type"],
+                        "start_s": segment["start_s"],
+                        "end_s": segment["end_s"],
+                        "max_confidence": segment["confidence"],
+                    }
+                )
+        return events
+
+    def summary(self, include_segments: bool = True) -> Dict[str, Any]:
+        progress = 1.0 if self.status == "done" else 0.0
+        if self.status != "done" and self.duration_s:
+            progress = min(self.processed_s / self.duration_s, 1.0)
+        summary = {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "status": self.status,
+            "progress": round(progress, 4),
+            "duration_s": round(self.duration_s, 2) if self.duration_s is not None else None,
+            "processed_s": round(self.processed_s, 2),
+            "windows": len(self.segments),
+            "error": self.error,
+        }
+        if include_segments:
+            summary["segments"] = self.segments
+            summary["events"] = self.events()
+        return summary
+
+
+_DONE = object()
+
+
+class TimelineRunner:
+    """
+    Background jobs that classify long videos window by window.
+
+    Each job decodes its file once in a worker thread (``VideoWindows``),
+    handing windows to the event loop through a queue of ``2 * batch_size``
+    so decoding never runs far ahead of the model. Each window becomes the
+    model input through ``preprocess`` (off the event loop, e.g. the
+    preprocess stage ``/detect`` uses) and is classified ``batch_size`` at a
+    time with ``classify``, which goes through the shared
+    micro-batcher, so they are batched into one forward pass and interleave
+    with ``/detect`` traffic. Segments are appended to the job as they finish,
+    so polling it shows incremental progress. At most ``concurrency`` jobs run
+    at once; the oldest finished jobs are forgotten beyond ``max_jobs``.
+    """
+
+    def __init__(
+        self,
+        classify: Callable[[torch.Tensor], Awaitable[Tuple[str, str, float, str]]],
+        *,
+        preprocess: Callable[[np.ndarray], Awaitable[Tuple[torch.Tensor, float]]],
+        window: int = 16,
+        stride: int = 8,
+        sample_fps: float = 2.0,
+        batch_size: int = 4,
+        concurrency: int = 1,
+        max_jobs: int = 32,
+    ):
+        self._classify = classify
+        self._preprocess = preprocess
+        self.window = window
+        self.stride = stride
+        self.sample_fps = sample_fps
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_jobs = max_jobs
+        self._jobs: "collections.OrderedDict[str, TimelineJob]" = collections.OrderedDict()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def get(self, job_id: str) -> TimelineJob | None:
+        return self._jobs.get(job_id)
+
+    def submit(self, path: str, filename: str) -> TimelineJob:
+        """Start a job on a video file; the file is deleted when the job ends."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        job = TimelineJob(job_id=uuid.uuid4().hex, filename=filename)
+        self._jobs[job.job_id] = job
+        self._evict()
+        task = asyncio.get_running_loop().create_task(self._run(job, path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def _evict(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in {"done", "failed"}]
+        while len(self._jobs) > self.max_jobs and finished:
+            del self._jobs[finished.pop(0)]
+
+    async def _run(self, job: TimelineJob, path: str) -> None:
+        try:
+            async with self._semaphore:
+                job.status = "running"
+                await self._analyze(job, path)
+                job.status = "done"
+        except Exception as exc:
+            logger.warning("Timeline job %s failed: %s", job.job_id, exc)
+            job.status = "failed"
+            job.error = str(exc)
+        finally:
+            job.finished_at = time.time()
+            if os.path.exists(path):
+                os.unlink(path)
+
+    async def _analyze(self, job: TimelineJob, path: str) -> None:
+        loop = asyncio.get_running_loop()
+        windows = await loop.run_in_executor(
+            None,
+            lambda: VideoWindows(path, window=self.window, stride=self.stride, sample_fps=self.sample_fps),
+        )
+        job.duration_s = windows.duration_s
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2 * self.batch_size)
+        stop = threading.Event()
+
+        def produce() -> None:
+            try:
+                for item in windows:
+                    if stop.is_set():
+                        return
+                    asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+                asyncio.run_coroutine_threadsafe(queue.put(_DONE), loop).result()
+            except Exception as exc:
+                if not stop.is_set():
+                    asyncio.run_coroutine_threadsafe(queue.put(exc), loop).result()
+
+        producer = loop.run_in_executor(None, produce)
+        try:
+            finished = False
+            while not finished:
+                batch = []
+                while len(batch) < self.batch_size:
+                    item = await queue.get()
+                    if isinstance(item, Exception):
+                        raise item
+                    if item is _DONE:
+                        finished = True
+                        break
+                    batch.append(item)
+                if not batch:
+                    break
+
+                results = await asyncio.gather(*(self._classify_window(frames) for _, _, frames in batch))
+                for (start_s, end_s, _), (label, alert_type, confidence, model_version) in zip(batch, results):
+                    job.segments.append(
+                        {
+                            "start_s": round(start_s, 2),
+                            "end_s": round(end_s, 2),
+                            "prediction": label,
+                            "alert_type": alert_type,
+                            "confidence": round(confidence, 4),
+                            "model_version": model_version,
+                        }
+                    )
+                job.processed_s = batch[-1][1]
+        finally:
+            stop.set()
+            # Unblock a producer waiting on a full queue
+            while not queue.empty():
+                queue.get_nowait()
+            await producer
+
+    async def _classify_window(self, frames: np.ndarray) -> Tuple[str, str, float, str]:
+        clip, _ = await self._preprocess(frames)
+        return await self._classify(clip)
+
+    def stats(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "window": self.window,
+            "stride": self.stride,
+            "sample_fps": self.sample_fps,
+            "batch_size": self.batch_size,
+            "concurrency": self.concurrency,
+            "jobs": statuses,
+        }
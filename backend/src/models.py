@@ -4,6 +4,7 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     REAL,
@@ -54,6 +55,13 @@ class Camera(Base):
 
 class Alert(Base):
     __tablename__ = "Alerts"
+    # Alert history (GET /alerts) pages newest first on (timestamp, alert_id), optionally per
+    # camera or status; existing databases get these from migrations/0001_alert_history_indexes.sql
+    __table_args__ = (
+        Index("ix_alerts_timestamp_id", "timestamp", "alert_id"),
+        Index("ix_alerts_camera_timestamp_id", "camera_id", "timestamp", "alert_id"),
+        Index("ix_alerts_status_timestamp_id", "status", "timestamp", "alert_id"),
+    )
 
     alert_id = Column(Integer, primary_key=True, index=True)
     camera_id = Column(
@@ -91,6 +99,7 @@ class Alert(Base):
 
 class EventMedia(Base):
     __tablename__ = "EventMedia"
+    __table_args__ = (Index("ix_event_media_alert_id", "alert_id"),)
 
     media_id = Column(Integer, primary_key=True, index=True)
     alert_id = Column(
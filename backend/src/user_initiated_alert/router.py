@@ -1,14 +1,44 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.user_initiated_alert import schemas, service, utils
+from db import get_db
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.UserInitiatedAlertResponseSchema)
-async def create_notification(data: schemas.UserInitiatedAlertCreateSchema):
-    record = await service.create_alert(data)
+async def create_notification(data: schemas.UserInitiatedAlertCreateSchema, db: AsyncSession = Depends(get_db)):
+    record = await service.create_alert(data, db)
     await utils.manager.broadcast(f"New alert: {record}")
     return record
 
+@router.get("/", response_model=schemas.AlertPageSchema)
+async def list_alerts(
+    camera_id: Optional[int] = None,
+    event_type: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[datetime] = Query(default=None, description="Alerts at or after this time"),
+    until: Optional[datetime] = Query(default=None, description="Alerts before this time"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+    limit: int = Query(default=50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        alerts, next_cursor = await service.list_alerts(
+            db,
+            camera_id=camera_id,
+            event_type=event_type,
+            status=status,
+            since=since,
+            until=until,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"items": alerts, "next_cursor": next_cursor}
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await utils.manager.connect(websocket)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class UserInitiatedAlertCreateSchema(BaseModel):
     camera_id: int = Field(..., description="ID of the camera where the alert was initiated")
@@ -18,6 +18,32 @@ class UserInitiatedAlertResponseSchema(BaseModel):
 
     class Config:
         from_attributes = True
+class AlertMediaSchema(BaseModel):
+    media_id: int
+    media_url: str
+    media_type: str
+
+    class Config:
+        from_attributes = True
+
+class AlertHistoryItemSchema(BaseModel):
+    alert_id: int
+    camera_id: int
+    event_type: str
+    status: str
+    confidence_score: Optional[float]
+    method: Optional[str]
+    timestamp: datetime
+    sent_at: Optional[datetime]
+    media_items: List[AlertMediaSchema]
+
+    class Config:
+        from_attributes = True
+
+class AlertPageSchema(BaseModel):
+    items: List[AlertHistoryItemSchema]
+    next_cursor: Optional[str] = Field(default=None, description="Pass as ?cursor= for the next (older) page; null on the last page")
+
 class SocketMessage(BaseModel):
     event_type: str
     payload: dict
@@ -1,10 +1,13 @@
-from datetime import datetime
-from db import SessionLocal
+import base64
+import json
+from datetime import datetime, timezone
+from typing import List, Tuple
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from src.models import Alert  # adjust import if needed
 
-async def create_alert(alert_dict):
-    db = SessionLocal()
-
+async def create_alert(alert_dict, db: AsyncSession):
     try:
         new_alert = Alert(
             camera_id=alert_dict.camera_id,
@@ -15,14 +18,72 @@ async def create_alert(alert_dict):
         )
 
         db.add(new_alert)
-        db.commit()
-        db.refresh(new_alert)
+        await db.commit()
 
         return new_alert
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
 
-    finally:
-        db.close()
+
+def encode_cursor(alert: Alert) -> str:
+    """Opaque position after ``alert`` in newest-first order."""
+    raw = json.dumps([alert.timestamp.isoformat(), alert.alert_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Alert timestamps are stored as naive UTC
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo is not None else value
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, alert_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(alert_id)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor {cursor!r}") from None
+
+
+async def list_alerts(
+    db: AsyncSession,
+    *,
+    camera_id: int | None = None,
+    event_type: str | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+) -> Tuple[List[Alert], str | None]:
+    """
+    One page of alerts, newest first, and the cursor of the next page (None
+    on the last one). Pages are keyset-paginated on (timestamp, alert_id), so
+    a deep page costs the same as the first one and alerts created while
+    paging do not shift later pages. Filters: camera, event type, status and
+    since <= timestamp < until. Media are loaded for the whole page in one
+    extra query.
+    """
+    query = select(Alert).options(selectinload(Alert.media_items))
+    if camera_id is not None:
+        query = query.where(Alert.camera_id == camera_id)
+    if event_type is not None:
+        query = query.where(Alert.event_type == event_type)
+    if status is not None:
+        query = query.where(Alert.status == status)
+    if since is not None:
+        query = query.where(Alert.timestamp >= _naive_utc(since))
+    if until is not None:
+        query = query.where(Alert.timestamp < _naive_utc(until))
+    if cursor is not None:
+        query = query.where(tuple_(Alert.timestamp, Alert.alert_id) < tuple_(*decode_cursor(cursor)))
+    # Matches the (…, timestamp, alert_id) indexes, read backwards; one extra row tells if there is a next page
+    query = query.order_by(Alert.timestamp.desc(), Alert.alert_id.desc()).limit(limit + 1)
+
+    alerts = list((await db.execute(query)).scalars().all())
+    if len(alerts) <= limit:
+        return alerts, None
+    alerts = alerts[:limit]
+    return alerts, encode_cursor(alerts[-1])
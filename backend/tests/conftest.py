@@ -0,0 +1,5 @@
+import os
+
+# src.model_alert imports db, which needs a database URL; tests that don't touch the database get
+# an in-memory SQLite one (nothing connects until a session is used)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
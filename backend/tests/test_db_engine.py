@@ -0,0 +1,12 @@
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+REALTIME_APP = BACKEND.parent / "realtime_alert_api" / "app"
+
+
+def test_realtime_app_ships_the_same_db_engine():
+    # The apps are deployed separately and each keeps a copy; line endings follow each app
+    backend_copy = (BACKEND / "db_engine.py").read_text().replace("\r\n", "\n")
+    realtime_copy = (REALTIME_APP / "db_engine.py").read_text().replace("\r\n", "\n")
+
+    assert realtime_copy == backend_copy, "backend/db_engine.py and realtime_alert_api/app/db_engine.py differ"
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from src.model_alert.extract_frames import extract_frames
+from src.model_alert.preprocess import INPUT_SIZE, NORM_MEAN, NORM_STD, frames_to_tensor
+
+SAMPLE = Path(__file__).resolve().parents[2] / "sample.mp4"
+
+
+def _reference(frames: np.ndarray) -> torch.Tensor:
+    """The normalization frames_to_tensor replaced: (x / 255 - mean) / std, then (1, C, T, H, W)."""
+    x = frames.astype(np.float64) / 255.0
+    x = (x - NORM_MEAN.astype(np.float64)) / NORM_STD.astype(np.float64)
+    return torch.from_numpy(x).permute(3, 0, 1, 2).unsqueeze(0)
+
+
+def test_fused_normalization_matches_reference():
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, size=(16, 32, 48, 3), dtype=np.uint8)
+    # Include the extremes of the uint8 range
+    frames[0] = 0
+    frames[1] = 255
+
+    clip = frames_to_tensor(frames)
+
+    assert clip.shape == (1, 3, 16, 32, 48)
+    assert clip.dtype == torch.float32
+    torch.testing.assert_close(clip.double(), _reference(frames), rtol=0, atol=1e-5)
+
+
+def test_fused_normalization_accepts_non_contiguous_frames():
+    rng = np.random.default_rng(1)
+    frames = rng.integers(0, 256, size=(8, 20, 20, 3), dtype=np.uint8)[:, ::2, ::2]
+
+    torch.testing.assert_close(frames_to_tensor(frames).double(), _reference(frames), rtol=0, atol=1e-5)
+
+
+def _baseline_pipeline(video: bytes) -> torch.Tensor:
+    """detect() before downscale-at-decode: full-resolution float32 frames, trilinear resize, normalize."""
+    frames, _ = extract_frames(video)
+    clip = torch.tensor(frames, dtype=torch.float32).permute(0, 3, 1, 2) / 255.0
+    clip = clip.unsqueeze(0).permute(0, 2, 1, 3, 4)
+    _, _, T, _, _ = clip.shape
+    clip = F.interpolate(clip, size=(T, INPUT_SIZE, INPUT_SIZE), mode="trilinear", align_corners=False)
+    mean = torch.from_numpy(NORM_MEAN).reshape(1, 3, 1, 1, 1)
+    std = torch.from_numpy(NORM_STD).reshape(1, 3, 1, 1, 1)
+    return (clip - mean) / std
+
+
+def test_downscale_at_decode_matches_baseline_pipeline():
+    video = SAMPLE.read_bytes()
+
+    frames, _ = extract_frames(video, size=(INPUT_SIZE, INPUT_SIZE))
+    clip = frames_to_tensor(frames)
+    baseline = _baseline_pipeline(video)
+
+    assert clip.shape == baseline.shape == (1, 3, 16, INPUT_SIZE, INPUT_SIZE)
+    # cv2's bilinear resize on uint8 frames rounds to whole pixel values and differs slightly from
+    # interpolate(); on sample.mp4 that is at most 0.014 after normalization (0.0035 on average)
+    torch.testing.assert_close(clip, baseline, rtol=0, atol=0.02)
+    assert (clip - baseline).abs().mean() < 0.01
@@ -0,0 +1,61 @@
+import asyncio
+import io
+from pathlib import Path
+
+import av
+import pytest
+from fastapi import UploadFile
+
+from src.model_alert.extract_frames import extract_frames
+from src.model_alert.upload import open_clip_upload, sniff_container
+
+SAMPLE = Path(__file__).resolve().parents[2] / "sample.mp4"
+PROBE_BYTES = 256 * 1024
+
+
+@pytest.fixture(scope="module")
+def ts_clip() -> bytes:
+    """sample.mp4 (8.8s) remuxed into MPEG-TS, which has no duration in its header."""
+    out_buf = io.BytesIO()
+    with av.open(str(SAMPLE)) as src, av.open(out_buf, "w", format="mpegts") as out:
+        stream = out.add_stream_from_template(src.streams.video[0])
+        for packet in src.demux(src.streams.video[0]):
+            if packet.dts is None:
+                continue
+            packet.stream = stream
+            out.mux(packet)
+    return out_buf.getvalue()
+
+
+def _open(data: bytes, **limits):
+    video = UploadFile(io.BytesIO(data), size=len(data), filename="clip")
+    limits = {"max_bytes": 64 * 1024 * 1024, "min_duration_s": 5.0, "max_duration_s": 10.0, **limits}
+    return asyncio.run(open_clip_upload(video, probe_bytes=PROBE_BYTES, **limits))
+
+
+def test_ts_clip_larger_than_probe_is_not_rejected_from_its_prefix(ts_clip):
+    assert len(ts_clip) > PROBE_BYTES
+    assert sniff_container(ts_clip[:PROBE_BYTES]) == "mpeg-ts"
+
+    clip = _open(ts_clip)
+
+    _, duration = extract_frames(clip, size=(224, 224))
+    assert 5.0 <= duration <= 10.0
+
+
+def test_mp4_duration_is_checked_from_the_prefix():
+    data = SAMPLE.read_bytes()
+    assert len(data) > PROBE_BYTES
+
+    with pytest.raises(ValueError, match="Clip must be between"):
+        _open(data, max_duration_s=5.0)
+
+
+def test_sniff_requires_ts_sync_byte_on_every_packet(ts_clip):
+    assert sniff_container(b"GIF89a" + bytes(1024)) is None
+    assert sniff_container(b"G" * 150) is None
+    assert sniff_container(ts_clip[:200]) == "mpeg-ts"
+
+    corrupted = bytearray(ts_clip[:1024])
+    corrupted[376] = 0
+    assert sniff_container(bytes(corrupted)) is None
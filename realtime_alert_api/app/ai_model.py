@@ -2,32 +2,89 @@ from pathlib import Path
 from typing import Tuple
 
 import torch
+import torch.nn.functional as F
+from torchvision.models import mobilenet_v3_small
 
 CLASS_LABELS = ["normal", "theft", "violence"]
 
 
-def load_inference_model() -> torch.nn.Module:
+class ClipScreener(torch.nn.Module):
     """
-    Load the trained PyTorch model for inference.
+    Lightweight first-stage classifier for the Swin3D cascade.
 
-    This is a placeholder implementation. Replace the architecture and path
-    with the actual model used in production.
+    Takes the same normalized ``(B, C, T, 224, 224)`` clip as ``ViolenceSwin3D``
+    but only looks at ``num_frames`` evenly spaced frames at half resolution.
+    Each frame goes through a MobileNetV3-Small trunk; the mean and standard
+    deviation of the frame features over time feed a linear head over
+    ``CLASS_LABELS``. About two orders of magnitude faster than the full model
+    on CPU.
     """
-    model_path = Path("model.pth")
-    model = torch.nn.Linear(1, len(CLASS_LABELS))
-    if model_path.exists():
-        state_dict = torch.load(model_path, map_location="cpu")
-        model.load_state_dict(state_dict)
+
+    def __init__(self, num_frames: int = 4, resolution: int = 112, pretrained_backbone: bool = False):
+        super().__init__()
+        self.num_frames = num_frames
+        self.resolution = resolution
+        # ImageNet weights for the trunk are only a starting point for distillation
+        backbone = mobilenet_v3_small(weights="DEFAULT" if pretrained_backbone else None)
+        self.features = torch.nn.Sequential(backbone.features, backbone.avgpool, torch.nn.Flatten())
+        self.head = torch.nn.Linear(2 * 576, len(CLASS_LABELS))
+
+    def reduce(self, clip: torch.Tensor) -> torch.Tensor:
+        """
+        The part of a ``(B, C, T, H, W)`` clip the screener looks at, as a
+        ``(B, C, num_frames, resolution, resolution)`` clip. ``forward`` gives
+        the same result on the reduced clip, so training can keep only this.
+        """
+        B, C, T, H, W = clip.shape
+        idxs = torch.linspace(0, T - 1, min(self.num_frames, T)).long()
+        frames = clip[:, :, idxs].transpose(1, 2).reshape(-1, C, H, W)
+        if H != self.resolution or W != self.resolution:
+            frames = F.interpolate(frames, size=(self.resolution, self.resolution), mode="bilinear", align_corners=False)
+        return frames.reshape(B, len(idxs), C, self.resolution, self.resolution).transpose(1, 2)
+
+    def forward(self, clip: torch.Tensor) -> torch.Tensor:
+        clip = self.reduce(clip)
+        B, C, T, H, W = clip.shape
+        frames = clip.transpose(1, 2).reshape(-1, C, H, W)
+
+        features = self.features(frames).reshape(B, T, -1)
+        pooled = torch.cat([features.mean(dim=1), features.std(dim=1, unbiased=False)], dim=1)
+        return self.head(pooled)
+
+
+def load_inference_model(model_path: str | Path = "model.pth") -> torch.nn.Module:
+    """
+    Load the screening model for the inference cascade.
+
+    ``model_path`` holds a ``ClipScreener`` state dict (optionally under a
+    ``"model_state"`` key). A screener with random weights would answer
+    "normal" for real incidents, so missing weights are an error.
+    """
+    model_path = Path(model_path)
+    if not model_path.exists():
+        raise FileNotFoundError(
+            f"Screener weights not found: {model_path} (distill them with the backend's python -m src.model_alert.distill_screener)"
+        )
+    model = ClipScreener()
+    state_dict = torch.load(model_path, map_location="cpu")
+    if isinstance(state_dict, dict) and "model_state" in state_dict:
+        state_dict = state_dict["model_state"]
+    model.load_state_dict(state_dict)
     model.eval()
     return model
 
 
+def suspicion_score(input_tensor: torch.Tensor, model: torch.nn.Module) -> float:
+    """Probability the screener assigns to anything other than "normal"."""
+    with torch.no_grad():
+        probs = torch.softmax(model(input_tensor), dim=-1)
+    return float(1.0 - probs[0, CLASS_LABELS.index("normal")].item())
+
+
 def run_inference(input_tensor: torch.Tensor, model: torch.nn.Module) -> Tuple[str, float]:
     """
-    Run inference on the given input tensor.
-
-    The implementation here is a placeholder. Replace this with the correct
-    preprocessing and forward pass required by the real model.
+    Run the screening model on a normalized ``(1, C, T, H, W)`` clip and
+    return its label and confidence.
     """
     with torch.no_grad():
         logits = model(input_tensor)
@@ -36,5 +93,3 @@ def run_inference(input_tensor: torch.Tensor, model: torch.nn.Module) -> Tuple[s
 
     label = CLASS_LABELS[int(idx.item())]
     return label, float(confidence.item())
-
-
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+import torch
+
+
+@dataclass
+class _PendingClip:
+    clip: torch.Tensor
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher:
+    """
+    Group concurrently submitted clips into a single forward pass.
+
+    Each caller submits a ``(1, C, T, H, W)`` clip and awaits its own
+    ``(1, num_classes)`` logits. A batch is flushed as soon as
+    ``max_batch_size`` clips are waiting or ``max_wait_ms`` has passed since
+    the oldest clip in it was queued. Clips with different shapes are never
+    mixed in one forward pass. The forward pass runs on ``executor`` (the
+    default loop executor when omitted), never on the event loop itself.
+
+    ``run_batch`` may return ``(logits, tag)`` instead of the logits alone,
+    e.g. with the model version that produced them; every caller in the
+    batch then gets ``(its logits, tag)``.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[torch.Tensor], torch.Tensor],
+        *,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        executor: Executor | None = None,
+    ):
+        self._run_batch = run_batch
+        self._executor = executor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+        self.batches = 0
+        self.clips = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+        self._queue_wait_total_s = 0.0
+        self._queue_wait_max_s = 0.0
+        self._forward_total_s = 0.0
+        self._started_at: float | None = None
+
+    async def submit(self, clip: torch.Tensor) -> Any:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingClip(clip=clip, future=future))
+        return await future
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+            self._started_at = time.perf_counter()
+
+    async def _run(self) -> None:
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            deadline = first.enqueued_at + self.max_wait_s
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    # Deadline passed: take whatever is already queued, don't wait.
+                    try:
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    except asyncio.QueueEmpty:
+                        break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            groups: Dict[tuple, List[_PendingClip]] = {}
+            for pending in batch:
+                groups.setdefault(tuple(pending.clip.shape[1:]), []).append(pending)
+
+            for group in groups.values():
+                try:
+                    await self._dispatch(group)
+                except Exception as exc:
+                    # Never let one bad group kill the worker and leave its callers waiting forever
+                    for pending in group:
+                        if not pending.future.done():
+                            pending.future.set_exception(exc)
+
+    async def _dispatch(self, group: List[_PendingClip]) -> None:
+        group = [pending for pending in group if not pending.future.done()]
+        if not group:
+            return
+
+        started = time.perf_counter()
+        for pending in group:
+            waited = started - pending.enqueued_at
+            self._queue_wait_total_s += waited
+            self._queue_wait_max_s = max(self._queue_wait_max_s, waited)
+        self.batches += 1
+        self.clips += len(group)
+        self.batch_size_histogram[len(group)] = self.batch_size_histogram.get(len(group), 0) + 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            clips = torch.cat([pending.clip for pending in group], dim=0)
+            output = await loop.run_in_executor(self._executor, self._run_batch, clips)
+        finally:
+            self._forward_total_s += time.perf_counter() - started
+
+        logits, tag = output if isinstance(output, tuple) else (output, None)
+        for i, pending in enumerate(group):
+            if not pending.future.done():
+                result = logits[i : i + 1]
+                pending.future.set_result(result if tag is None else (result, tag))
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._started_at if self._started_at is not None else 0.0
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait_s * 1000.0, 3),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "clips": self.clips,
+            "avg_batch_size": round(self.clips / self.batches, 3) if self.batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+            "avg_queue_wait_ms": round(self._queue_wait_total_s / self.clips * 1000.0, 3) if self.clips else 0.0,
+            "max_queue_wait_ms": round(self._queue_wait_max_s * 1000.0, 3),
+            "avg_forward_ms": round(self._forward_total_s / self.batches * 1000.0, 3) if self.batches else 0.0,
+            # Fraction of time the model thread spent in forward passes
+            "occupancy": round(self._forward_total_s / elapsed, 4) if elapsed else 0.0,
+        }
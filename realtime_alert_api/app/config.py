@@ -0,0 +1,68 @@
+import os
+
+# Model loading; the checkpoint defaults to backend/model/muhafiz_swin3d_final.pth
+MODEL_CHECKPOINT_PATH = os.getenv("MODEL_CHECKPOINT_PATH")
+MODEL_WARMUP_RUNS = int(os.getenv("MODEL_WARMUP_RUNS", "1"))
+# Forward pass backend: "eager", "compile", "torchscript" or "onnx"; the last two load an
+# artifact from "python -m app.backends export" (default: next to the checkpoint)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "eager")
+MODEL_ARTIFACT_PATH = os.getenv("MODEL_ARTIFACT_PATH")
+# CPU precision for eager/compile: "fp32", "int8" (dynamic quantization) or "bf16" (autocast)
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "fp32")
+# Hot-swap: a replacement model must give sane logits on this clip (default: a fixed random
+# clip) before it serves; the model file is polled for changes every interval (0 disables)
+MODEL_CANARY_CLIP = os.getenv("MODEL_CANARY_CLIP")
+MODEL_WATCH_INTERVAL_S = float(os.getenv("MODEL_WATCH_INTERVAL_S", "0"))
+
+# Inference profiles (name=FRAMESxSIZE), each warmed up at startup; cameras are assigned with
+# INFERENCE_CAMERA_PROFILES ("3=fast,12=accurate") and /api/v1/detect?profile= overrides per request
+INFERENCE_PROFILES = os.getenv("INFERENCE_PROFILES", "fast=8x160,accurate=16x224")
+INFERENCE_DEFAULT_PROFILE = os.getenv("INFERENCE_DEFAULT_PROFILE", "accurate")
+INFERENCE_CAMERA_PROFILES = os.getenv("INFERENCE_CAMERA_PROFILES", "")
+
+# Micro-batching of /detect clips into a single forward pass
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "8"))
+MAX_BATCH_WAIT_MS = float(os.getenv("MAX_BATCH_WAIT_MS", "10"))
+
+# Upload limits for /detect; container and duration are probed from the first bytes
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(64 * 1024 * 1024)))
+UPLOAD_PROBE_BYTES = int(os.getenv("UPLOAD_PROBE_BYTES", str(1024 * 1024)))
+
+# Frame sampling: "auto", "seek", "sequential" or "keyframe" (needs PyAV)
+DECODE_STRATEGY = os.getenv("DECODE_STRATEGY", "auto")
+# Clip decoding: "auto" (PyAV from memory when installed), "pyav" or "opencv"
+DECODE_BACKEND = os.getenv("DECODE_BACKEND", "auto")
+
+# Clips whose motion score is below this skip the model and report "normal" (0 disables)
+MOTION_THRESHOLD = float(os.getenv("MOTION_THRESHOLD", "0"))
+
+# Two-stage cascade: a screener (ai_model.ClipScreener weights) runs first and only clips
+# with suspicion >= CASCADE_THRESHOLD reach Swin3D; CASCADE_AUDIT_RATE of the rest are
+# re-checked by Swin3D in the background to measure agreement. Off unless set; the weights come
+# from the backend's python -m src.model_alert.distill_screener, and a missing file keeps Swin3D-only
+CASCADE_SCREENER_PATH = os.getenv("CASCADE_SCREENER_PATH")
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", "0.3"))
+CASCADE_AUDIT_RATE = float(os.getenv("CASCADE_AUDIT_RATE", "0.05"))
+
+# Results of repeated /detect uploads, keyed by clip hash + sampling params + model version
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() in {"1", "true", "yes"}
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+RESULT_CACHE_TTL_S = float(os.getenv("RESULT_CACHE_TTL_S", "600"))
+# SQLite file to keep the cache across restarts
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH")
+
+# Camera and alert-recipient lookups, cached per process and dropped when a Camera or User is
+# written through the ORM (0 TTL disables)
+LOOKUP_CACHE_TTL_S = float(os.getenv("LOOKUP_CACHE_TTL_S", "300"))
+LOOKUP_CACHE_MAX_ENTRIES = int(os.getenv("LOOKUP_CACHE_MAX_ENTRIES", "1024"))
+
+# Request pipeline: decode (INFERENCE_WORKERS in a "thread" or "process" pool) ->
+# preprocess (PREPROCESS_WORKERS threads) -> batched inference, with PIPELINE_QUEUE_SIZE
+# slots in front of each stage; admission control caps requests in flight
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", "1"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "16"))
+INFERENCE_RETRY_AFTER_S = int(os.getenv("INFERENCE_RETRY_AFTER_S", "2"))
@@ -1,5 +1,8 @@
-from typing import List, Sequence
+from datetime import datetime
+from typing import List, Sequence, Tuple
 
+from sqlalchemy import Select, insert, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import models
@@ -13,6 +16,28 @@ def get_camera(db: Session, camera_id: int) -> models.Camera | None:
     return db.query(models.Camera).filter(models.Camera.camera_id == camera_id).first()
 
 
+def _camera_and_recipient_query(camera_id: int) -> Select:
+    return (
+        select(models.Camera, models.User)
+        .outerjoin(models.User, true())
+        .where(models.Camera.camera_id == camera_id)
+        .limit(1)
+    )
+
+
+def get_camera_and_recipient(db: Session, camera_id: int) -> Tuple[models.Camera | None, models.User | None]:
+    """The camera and the user its alerts are sent to, in one query."""
+    row = db.execute(_camera_and_recipient_query(camera_id)).first()
+    return (row[0], row[1]) if row is not None else (None, None)
+
+
+async def get_camera_and_recipient_async(
+    db: AsyncSession, camera_id: int
+) -> Tuple[models.Camera | None, models.User | None]:
+    row = (await db.execute(_camera_and_recipient_query(camera_id))).first()
+    return (row[0], row[1]) if row is not None else (None, None)
+
+
 def create_alert(
     db: Session,
     *,
@@ -39,6 +64,85 @@ def create_alert(
     return alert
 
 
+def _new_alert(
+    camera_id: int,
+    recipient_id: int,
+    event_type: str,
+    confidence_score: float | None,
+    status: str,
+    method: str,
+    user_id: int | None,
+) -> models.Alert:
+    return models.Alert(
+        camera_id=camera_id,
+        user_id=user_id,
+        sent_to_INT=recipient_id,
+        event_type=event_type,
+        confidence_score=confidence_score,
+        method=method,
+        status=status,
+    )
+
+
+def add_alert_with_media(
+    db: Session,
+    *,
+    camera_id: int,
+    recipient_id: int,
+    event_type: str,
+    confidence_score: float | None,
+    media_urls: Sequence[str],
+    media_type: str,
+    status: str = "pending",
+    method: str = "model",
+    user_id: int | None = None,
+) -> models.Alert:
+    """
+    Stage an alert and its media in the current transaction without
+    committing. The alert is flushed so its id comes back from the INSERT
+    (RETURNING on PostgreSQL), and the media rows go in as one executemany.
+    """
+    alert = _new_alert(camera_id, recipient_id, event_type, confidence_score, status, method, user_id)
+    db.add(alert)
+    db.flush()
+    if media_urls:
+        db.execute(insert(models.EventMedia), _media_rows(alert.alert_id, media_urls, media_type))
+    return alert
+
+
+async def add_alert_with_media_async(
+    db: AsyncSession,
+    *,
+    camera_id: int,
+    recipient_id: int,
+    event_type: str,
+    confidence_score: float | None,
+    media_urls: Sequence[str],
+    media_type: str,
+    status: str = "pending",
+    method: str = "model",
+    user_id: int | None = None,
+) -> models.Alert:
+    alert = _new_alert(camera_id, recipient_id, event_type, confidence_score, status, method, user_id)
+    db.add(alert)
+    await db.flush()
+    if media_urls:
+        await db.execute(insert(models.EventMedia), _media_rows(alert.alert_id, media_urls, media_type))
+    return alert
+
+
+def _media_rows(alert_id: int, media_urls: Sequence[str], media_type: str) -> List[dict]:
+    return [{"alert_id": alert_id, "media_url": url, "media_type": media_type} for url in media_urls]
+
+
+def set_alert_delivery(db: Session, alert_id: int, sent: bool) -> None:
+    values = {models.Alert.status: "sent" if sent else "failed"}
+    if sent:
+        values[models.Alert.sent_at] = datetime.utcnow()
+    db.query(models.Alert).filter(models.Alert.alert_id == alert_id).update(values)
+    db.commit()
+
+
 def create_event_media(
     db: Session,
     *,
@@ -1,19 +1,30 @@
 import os
 from urllib.parse import quote_plus
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
 
-DB_USER = os.getenv("DB_USER", "postgres")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "12345")
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "5433") 
-DB_NAME = os.getenv("DB_NAME", "RTVATD")
+from dotenv import load_dotenv
+from sqlalchemy.orm import declarative_base
 
-encoded_password = quote_plus(DB_PASSWORD)
-SQLALCHEMY_DATABASE_URL = f"postgresql://{DB_USER}:{encoded_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+from .db_engine import Database
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+load_dotenv()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# DATABASE_URL, else PostgreSQL from the DB_* settings
+DATABASE_URL = os.getenv("DATABASE_URL") or "postgresql://{}:{}@{}:{}/{}".format(
+    os.getenv("DB_USER", "postgres"),
+    quote_plus(os.getenv("DB_PASSWORD", "12345")),
+    os.getenv("DB_HOST", "localhost"),
+    os.getenv("DB_PORT", "5433"),
+    os.getenv("DB_NAME", "RTVATD"),
+)
 
-Base = declarative_base()
\ No newline at end of file
+# Sync engine and sessions for code running in worker threads (push delivery), async ones for
+# the request handlers; see db_engine.py
+database = Database(DATABASE_URL, os.getenv("ASYNC_DATABASE_URL"))
+engine, SessionLocal = database.engine, database.SessionLocal
+ASYNC_DATABASE_URL = database.async_url
+async_engine, AsyncSessionLocal = database.async_engine, database.AsyncSessionLocal
+get_db = database.get_db
+pool_stats = database.pool_stats
+
+# Base for models
+Base = declarative_base()
@@ -0,0 +1,101 @@
+import asyncio
+import contextlib
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class InferenceBusyError(RuntimeError):
+    def __init__(self, retry_after_s: int):
+        super().__init__("Inference queue is full, retry later.")
+        self.retry_after_s = retry_after_s
+
+
+class InferenceExecutor:
+    """
+    Dedicated pool for decode/preprocessing work with bounded admission.
+
+    ``slot()`` admits at most ``max_pending`` requests into the inference path
+    (running plus waiting). Past that, callers get ``InferenceBusyError``
+    immediately instead of queueing behind the backlog. ``kind`` selects a
+    thread or process pool for decoding; tensor preparation runs on the
+    ``preprocess_pool`` threads and the model forward pass always on the
+    single ``model_pool`` thread so the weights are loaded only once.
+    """
+
+    def __init__(
+        self,
+        *,
+        kind: str = "thread",
+        max_workers: int = 2,
+        max_pending: int = 16,
+        retry_after_s: int = 2,
+        preprocess_workers: int = 1,
+    ):
+        if kind not in {"thread", "process"}:
+            raise ValueError("Executor kind must be 'thread' or 'process'")
+
+        self.kind = kind
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+        self.retry_after_s = int(retry_after_s)
+
+        self._pool: Executor | None = None
+        self.preprocess_pool = ThreadPoolExecutor(
+            max_workers=max(1, int(preprocess_workers)),
+            thread_name_prefix="preprocess",
+        )
+        self.model_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="swin3d")
+
+        self.pending = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="decode",
+                )
+        return self._pool
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise InferenceBusyError(self.retry_after_s)
+
+        self.pending += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self.preprocess_pool.shutdown(wait=False, cancel_futures=True)
+        self.model_pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
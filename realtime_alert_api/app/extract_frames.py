@@ -1,62 +1,336 @@
+import io
 import os
+import threading
+import time
 import cv2
 import numpy as np
 import tempfile
 
+try:
+    import av
+except ImportError:  # without PyAV clips are decoded with OpenCV only
+    av = None
+
+SAMPLING_STRATEGIES = ("auto", "seek", "sequential", "keyframe")
+DECODE_BACKENDS = ("auto", "pyav", "opencv")
+
+# Every frame is a keyframe in these codecs, so seeking never re-decodes a GOP
+_INTRA_ONLY_CODECS = {
+    "MJPG", "JPEG", "MJPEG", "PNG", "PNG ", "FFV1", "PRORES",
+    "APCN", "APCH", "APCS", "APCO", "AP4H", "AVDJ",
+}
+
+
+class _StrategySelector:
+    """
+    Pick "seek" or "sequential" per codec from measured decode cost.
+
+    Each codec gets a few trial clips with both strategies; after that the one
+    with the lower decode time per source frame wins. Intra-only codecs always
+    seek because random access is free there.
+    """
+
+    TRIALS = 3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: dict[tuple[str, str], list[float]] = {}
+
+    def choose(self, codec: str) -> str:
+        if codec.split(":")[-1] in _INTRA_ONLY_CODECS:
+            return "seek"
+        with self._lock:
+            for strategy in ("sequential", "seek"):
+                if self._samples.get((codec, strategy), [0, 0.0])[0] < self.TRIALS:
+                    return strategy
+            return min(("sequential", "seek"), key=lambda s: self._cost(codec, s))
+
+    def record(self, codec: str, strategy: str, seconds: float, total_frames: int) -> None:
+        with self._lock:
+            sample = self._samples.setdefault((codec, strategy), [0, 0.0])
+            sample[0] += 1
+            sample[1] += seconds / max(total_frames, 1)
+
+    def _cost(self, codec: str, strategy: str) -> float:
+        count, total = self._samples[(codec, strategy)]
+        return total / count
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                f"{codec}/{strategy}": {
+                    "clips": count,
+                    "avg_ms_per_source_frame": round(total / count * 1000.0, 4),
+                }
+                for (codec, strategy), (count, total) in self._samples.items()
+                if count
+            }
+
+
+strategy_selector = _StrategySelector()
+
+
+def _read_all(video) -> bytes:
+    if isinstance(video, (bytes, bytearray, memoryview)):
+        return bytes(video)
+    video.seek(0)
+    return video.read()
+
+
+class _OpenCVSource:
+    """
+    OpenCV needs a path, so the clip is exposed through an anonymous memfd
+    (``/proc/self/fd/N``) where available and a temp file otherwise.
+    """
+
+    backend = "opencv"
+
+    def __init__(self, video):
+        self._fd = None
+        self._tmp_path = None
+        data = _read_all(video)
+
+        if hasattr(os, "memfd_create"):
+            self._fd = os.memfd_create("clip")
+            with open(self._fd, "wb", closefd=False) as fh:
+                fh.write(data)
+            path = f"/proc/self/fd/{self._fd}"
+        else:
+            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
+            with tmp:
+                tmp.write(data)
+            self._tmp_path = path = tmp.name
+
+        self.cap = cv2.VideoCapture(path)
+        self.total = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = float(self.cap.get(cv2.CAP_PROP_FPS) or 0.0)
+        fourcc = int(self.cap.get(cv2.CAP_PROP_FOURCC) or 0)
+        self.codec = "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)).upper()
+
+    def frames(self, idxs, strategy):
+        if strategy == "sequential":
+            # Walk the stream once; grab() skips the colour conversion and copy
+            # that retrieve() does, so only the sampled frames pay for it.
+            position = 0
+            for i in idxs:
+                while position < i:
+                    if not self.cap.grab():
+                        return
+                    position += 1
+                if not self.cap.grab():
+                    return
+                position += 1
+                ret, frame = self.cap.retrieve()
+                if ret:
+                    yield frame
+        else:
+            for i in idxs:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, i)
+                ret, frame = self.cap.read()
+                if ret:
+                    yield frame
+
+    def close(self):
+        self.cap.release()
+        if self._fd is not None:
+            os.close(self._fd)
+        if self._tmp_path is not None and os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
+
+
+class _PyAVSource:
+    """Decode straight from memory (bytes or any seekable file object)."""
+
+    backend = "pyav"
+
+    def __init__(self, video):
+        if isinstance(video, (bytes, bytearray, memoryview)):
+            video = io.BytesIO(video)
+        else:
+            video.seek(0)
+        try:
+            self.container = av.open(video, mode="r")
+        except av.FFmpegError:
+            raise ValueError("Invalid clip: unable to determine FPS or frame count.")
+        if not self.container.streams.video:
+            self.container.close()
+            raise ValueError("Invalid clip: unable to determine FPS or frame count.")
+        self.stream = self.container.streams.video[0]
+
+        self.stream.thread_type = "AUTO"
+        self.fps = float(self.stream.average_rate or self.stream.guessed_rate or 0.0)
+        self.total = int(self.stream.frames or 0)
+        if self.total <= 0 and self.container.duration and self.fps > 0:
+            self.total = int(self.container.duration / av.time_base * self.fps)
+        self.codec = self.stream.codec_context.name.upper()
+        self._start = self.stream.start_time or 0
+
+    def _index(self, frame) -> int:
+        return int(round(float((frame.pts - self._start) * self.stream.time_base) * self.fps))
+
+    def frames(self, idxs, strategy):
+        if strategy == "keyframe":
+            yield from self._keyframes(idxs)
+        elif strategy == "sequential":
+            targets = iter(idxs)
+            target = next(targets)
+            for index, frame in enumerate(self.container.decode(self.stream)):
+                if index < target:
+                    continue
+                yield frame.to_ndarray(format="bgr24")
+                target = next(targets, None)
+                if target is None:
+                    return
+        else:
+            for i in idxs:
+                pts = self._start + int(i / self.fps / self.stream.time_base)
+                self.container.seek(pts, stream=self.stream, backward=True)
+                for frame in self.container.decode(self.stream):
+                    if frame.pts is not None and self._index(frame) >= i:
+                        yield frame.to_ndarray(format="bgr24")
+                        break
+
+    def _keyframes(self, idxs):
+        # Decode keyframes only and use the nearest one for each sampled index.
+        self.stream.codec_context.skip_frame = "NONKEY"
+        keyframes = []
+        for frame in self.container.decode(self.stream):
+            if frame.pts is None:
+                continue
+            keyframes.append((self._index(frame), frame.to_ndarray(format="bgr24")))
+            if keyframes[-1][0] >= idxs[-1]:
+                break
+
+        if not keyframes:
+            return
+        for i in idxs:
+            yield min(keyframes, key=lambda keyframe: abs(keyframe[0] - i))[1]
+
+    def close(self):
+        self.container.close()
+
+
+def _open_source(video, backend: str = "auto"):
+    if backend not in DECODE_BACKENDS:
+        raise ValueError(f"Unknown decode backend '{backend}'. Must be one of {list(DECODE_BACKENDS)}")
+    if av is not None and backend in {"auto", "pyav"}:
+        return _PyAVSource(video)
+    return _OpenCVSource(video)
+
+
+def check_duration(duration: float, min_duration_s: float, max_duration_s: float) -> None:
+    if duration < min_duration_s or duration > max_duration_s:
+        raise ValueError(
+            f"Clip must be between {min_duration_s:.0f}s and "
+            f"{max_duration_s:.0f}s (received {duration:.2f}s)."
+        )
+
+
+def probe_duration(video, backend: str = "auto") -> float | None:
+    """
+    Clip duration as the demuxer reports it, or ``None`` when it cannot tell.
+
+    On a truncated prefix this is only the real duration for containers that
+    state it in their header (an MP4 ``moov`` atom at the front, Matroska's
+    segment info). MPEG-TS/PS have no header duration and the demuxers
+    estimate it from the bytes available, so a prefix reads as a shorter clip.
+    """
+    try:
+        source = _open_source(video, backend)
+    except ValueError:
+        return None
+    try:
+        if source.fps <= 0.0 or source.total <= 0:
+            return None
+        return source.total / source.fps
+    finally:
+        source.close()
+
 
 def extract_frames(
     video_bytes,
     num_frames: int = 16,
     min_duration_s: float = 5.0,
     max_duration_s: float = 10.0,
+    size: tuple[int, int] | None = None,
+    strategy: str = "auto",
+    stats: dict | None = None,
+    backend: str = "auto",
 ):
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
-    cap = None
+    """
+    Sample ``num_frames`` RGB frames evenly across the clip.
 
-    try:
-        tmp.write(video_bytes)
-        tmp.flush()
-        tmp.close()
+    ``video_bytes`` may be raw bytes or a seekable file object; nothing is
+    written to disk. The ``"pyav"`` backend decodes from memory directly, the
+    ``"opencv"`` backend goes through an in-memory file descriptor, and
+    ``"auto"`` prefers PyAV when it is installed.
+
+    With ``size=(height, width)`` each frame is resized right after decoding
+    and written into one preallocated uint8 buffer, so full-resolution frames
+    are never accumulated.
 
-        cap = cv2.VideoCapture(tmp.name)
-        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+    ``strategy`` picks how the sampled frames are reached: ``"seek"`` jumps to
+    each index, ``"sequential"`` decodes the stream once and keeps only the
+    sampled frames, ``"keyframe"`` decodes keyframes only (fastest, coarser
+    timing; needs PyAV) and ``"auto"`` chooses between seek and sequential per
+    codec. If ``stats`` is given it is filled with the backend, codec, the
+    strategy used and the decode time.
+    """
+    if strategy not in SAMPLING_STRATEGIES:
+        raise ValueError(f"Unknown sampling strategy '{strategy}'. Must be one of {list(SAMPLING_STRATEGIES)}")
+
+    if av is None and strategy == "keyframe":
+        strategy = "auto"
+    if strategy == "keyframe":
+        backend = "pyav"
+
+    source = _open_source(video_bytes, backend)
+
+    try:
+        total = source.total
+        fps = source.fps
 
         if fps <= 0.0 or total <= 0:
             raise ValueError("Invalid clip: unable to determine FPS or frame count.")
 
         duration = total / fps
-        if duration < min_duration_s or duration > max_duration_s:
-            raise ValueError(
-                f"Clip must be between {min_duration_s:.0f}s and "
-                f"{max_duration_s:.0f}s (received {duration:.2f}s)."
-            )
+        check_duration(duration, min_duration_s, max_duration_s)
 
         frames_to_sample = min(num_frames, total)
         if frames_to_sample <= 0:
             raise ValueError("Clip does not contain enough frames.")
 
         idxs = np.linspace(0, total - 1, frames_to_sample).astype(int)
-        frames = []
 
-        for i in idxs:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-            ret, frame = cap.read()
-            if not ret:
-                continue
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frames.append(frame)
+        codec = f"{source.backend}:{source.codec}"
+        if strategy == "auto":
+            strategy = strategy_selector.choose(codec)
 
-        if not frames:
-            raise ValueError("Unable to decode frames from the clip.")
+        decode_start = time.perf_counter()
+        decoded = source.frames(idxs, strategy)
 
-        return np.array(frames), duration
+        if size is not None:
+            height, width = size
+            buffer = np.empty((frames_to_sample, height, width, 3), dtype=np.uint8)
+            count = 0
+            for frame in decoded:
+                cv2.resize(frame, (width, height), dst=buffer[count], interpolation=cv2.INTER_LINEAR)
+                cv2.cvtColor(buffer[count], cv2.COLOR_BGR2RGB, dst=buffer[count])
+                count += 1
+            frames = buffer[:count]
+        else:
+            frames = np.array([cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in decoded])
 
-    finally:
-        if cap is not None:
-            cap.release()
-        tmp.close()
-        if os.path.exists(tmp.name):
-            os.unlink(tmp.name)
+        decode_seconds = time.perf_counter() - decode_start
+        if strategy != "keyframe":
+            strategy_selector.record(codec, strategy, decode_seconds, total)
+        if stats is not None:
+            stats.update(backend=source.backend, codec=source.codec, strategy=strategy, decode_seconds=decode_seconds)
 
+        if len(frames) == 0:
+            raise ValueError("Unable to decode frames from the clip.")
+
+        return frames, duration
 
+    finally:
+        source.close()
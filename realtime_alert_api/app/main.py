@@ -1,24 +1,35 @@
 from typing import List, Optional
 
+import asyncio
+import logging
+
 import firebase_admin
-from fastapi import Depends, FastAPI, HTTPException, UploadFile, File
+from fastapi import Depends, FastAPI, HTTPException, Response, UploadFile, File
 from firebase_admin import credentials
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import torch
 import torch.nn.functional as F
 import json
 import os
-import numpy as np
 import time 
 
-from . import alert_service, models
-from .database import Base, SessionLocal, engine
-from .extract_frames import extract_frames
-from .swin_model import ViolenceSwin3D
+from . import alert_service, config, models
+from .batching import MicroBatcher
+from .cascade import ScreeningCascade
+from .database import Base, engine, get_db, pool_stats
+from .executor import InferenceBusyError, InferenceExecutor
+from .extract_frames import strategy_selector
+from .model_manager import ModelManager, ModelNotReadyError, ReloadInProgressError
+from .motion import MotionGate
+from .pipeline import PipelineStage
+from .preprocess import decode_clip, prepare_clip, preprocess_frames
+from .profiles import ProfileRouter, parse_camera_profiles, parse_profiles
+from .result_cache import ResultCache, clip_cache_key
+from .upload import UploadLimitMiddleware, UploadTooLargeError, open_clip_upload
+
 
-NORM_MEAN = np.array([0.485, 0.456, 0.406]).astype(np.float32)
-NORM_STD = np.array([0.229, 0.224, 0.225]).astype(np.float32)
+logger = logging.getLogger(__name__)
 
 
 class TriggerAlertPayload(BaseModel):
@@ -30,15 +41,13 @@ class TriggerAlertPayload(BaseModel):
     )
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+class ModelReloadRequest(BaseModel):
+    path: Optional[str] = Field(None, description="Checkpoint or artifact to load; defaults to the current file")
 
 
 app = FastAPI(title="Realtime Theft and Violence Detection")
+# Multipart overhead on top of the clip itself
+app.add_middleware(UploadLimitMiddleware, max_bytes=config.MAX_UPLOAD_BYTES + 64 * 1024)
 
 _classes_path = os.path.join(os.path.dirname(__file__), "classes.json")
 _raw_classes = json.load(open(_classes_path))
@@ -49,19 +58,89 @@ else:
     
 device = "cuda" if torch.cuda.is_available() else "cpu"
 
-model = ViolenceSwin3D(num_classes=len(CLASSES)).to(device) 
-
 CHECKPOINT_FILE = "muhafiz_swin3d_final.pth"
 _project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-_checkpoint_path = os.path.join(_project_root, "backend", "model", CHECKPOINT_FILE)
-checkpoint = torch.load(_checkpoint_path, map_location=device)
-if isinstance(checkpoint, dict) and "model_state" in checkpoint:
-    state_dict = checkpoint["model_state"]
-else:
-    state_dict = checkpoint
+_checkpoint_path = config.MODEL_CHECKPOINT_PATH or os.path.join(_project_root, "backend", "model", CHECKPOINT_FILE)
+
+profile_router = ProfileRouter(
+    parse_profiles(config.INFERENCE_PROFILES),
+    default=config.INFERENCE_DEFAULT_PROFILE,
+    cameras=parse_camera_profiles(config.INFERENCE_CAMERA_PROFILES),
+)
+
+model_manager = ModelManager(
+    checkpoint_path=_checkpoint_path,
+    num_classes=len(CLASSES),
+    device=device,
+    input_shapes=profile_router.shapes,
+    warmup_runs=config.MODEL_WARMUP_RUNS,
+    retry_after_s=config.INFERENCE_RETRY_AFTER_S,
+    backend=config.MODEL_BACKEND,
+    artifact_path=config.MODEL_ARTIFACT_PATH,
+    precision=config.MODEL_PRECISION,
+)
+
+inference_executor = InferenceExecutor(
+    kind=config.INFERENCE_EXECUTOR,
+    max_workers=config.INFERENCE_WORKERS,
+    max_pending=config.INFERENCE_QUEUE_SIZE,
+    retry_after_s=config.INFERENCE_RETRY_AFTER_S,
+    preprocess_workers=config.PREPROCESS_WORKERS,
+)
 
-model.load_state_dict(state_dict, strict=False)
-model.eval()
+batcher = MicroBatcher(
+    model_manager.forward,
+    max_batch_size=config.MAX_BATCH_SIZE,
+    max_wait_ms=config.MAX_BATCH_WAIT_MS,
+    executor=inference_executor.model_pool,
+)
+
+
+async def _decode(item):
+    clip, profile = item
+    return await inference_executor.run(
+        decode_clip,
+        clip,
+        num_frames=profile.num_frames,
+        size=profile.size,
+        min_duration_s=5.0,
+        max_duration_s=10.0,
+        strategy=config.DECODE_STRATEGY,
+        backend=config.DECODE_BACKEND,
+    )
+
+
+async def _preprocess(frames):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor.preprocess_pool, preprocess_frames, frames)
+
+
+# Inference is the third stage: the micro-batcher in front of the model thread
+decode_stage = PipelineStage(
+    "decode", _decode, workers=config.INFERENCE_WORKERS, queue_size=config.PIPELINE_QUEUE_SIZE
+)
+preprocess_stage = PipelineStage(
+    "preprocess", _preprocess, workers=config.PREPROCESS_WORKERS, queue_size=config.PIPELINE_QUEUE_SIZE
+)
+
+result_cache = None
+if config.RESULT_CACHE_ENABLED:
+    result_cache = ResultCache(
+        max_entries=config.RESULT_CACHE_MAX_ENTRIES,
+        max_bytes=config.RESULT_CACHE_MAX_BYTES,
+        ttl_s=config.RESULT_CACHE_TTL_S,
+        path=config.RESULT_CACHE_PATH,
+    )
+
+cascade = None
+if config.CASCADE_SCREENER_PATH:
+    cascade = ScreeningCascade(
+        config.CASCADE_SCREENER_PATH,
+        threshold=config.CASCADE_THRESHOLD,
+        audit_rate=config.CASCADE_AUDIT_RATE,
+    )
+
+motion_gate = MotionGate(config.MOTION_THRESHOLD)
 
 # Define Mapping for Alert Triggering (6 prediction classes -> 3 alert types)
 PREDICTION_TO_ALERT_MAP = {
@@ -74,9 +153,53 @@ PREDICTION_TO_ALERT_MAP = {
 }
 
 
+async def _classify_full(clip: torch.Tensor):
+    logits, version = await batcher.submit(clip)
+    probs = F.softmax(logits, dim=1)
+    conf, pred = torch.max(probs, dim=1)
+    predicted_label = CLASSES[int(pred.item())]
+    return predicted_label, PREDICTION_TO_ALERT_MAP.get(predicted_label, "normal"), float(conf.item()), version
+
+
+async def classify(clip: torch.Tensor):
+    if cascade is not None:
+        return await cascade.classify(clip, _classify_full)
+    return await _classify_full(clip)
+
+
+_watch_task: Optional[asyncio.Task] = None
+
+
+def _load_canary(path: str) -> None:
+    profile = profile_router.profiles[profile_router.default]
+    try:
+        with open(path, "rb") as fh:
+            clip, _, _ = prepare_clip(
+                fh.read(),
+                num_frames=profile.num_frames,
+                size=profile.size,
+                min_duration_s=0,
+                max_duration_s=1e9,
+                backend=config.DECODE_BACKEND,
+            )
+    except Exception:
+        logger.exception("Could not load canary clip %s; reloads are checked on a synthetic clip", path)
+        return
+    model_manager.canary = clip
+
+
 @app.on_event("startup")
 def on_startup() -> None:
+    global _watch_task
     Base.metadata.create_all(bind=engine)
+    # Load and warm up the model in the background so /health answers immediately
+    model_manager.start(inference_executor.model_pool)
+    if config.MODEL_CANARY_CLIP:
+        inference_executor.preprocess_pool.submit(_load_canary, config.MODEL_CANARY_CLIP)
+    if config.MODEL_WATCH_INTERVAL_S > 0:
+        _watch_task = asyncio.get_running_loop().create_task(model_manager.watch(config.MODEL_WATCH_INTERVAL_S))
+    if cascade is not None:
+        cascade.start()
 
     if not firebase_admin._apps:
         try:
@@ -92,10 +215,22 @@ def on_startup() -> None:
             pass
 
 
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    if _watch_task is not None:
+        _watch_task.cancel()
+    inference_executor.shutdown()
+    if result_cache is not None:
+        result_cache.close()
+    if cascade is not None:
+        cascade.shutdown()
+    alert_service.shutdown()
+
+
 @app.post("/api/v1/trigger-alert")
-def trigger_alert(
+async def trigger_alert(
     payload: TriggerAlertPayload,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     valid_types = {"theft", "violence", "manual_report", "normal"} 
     if payload.event_type not in valid_types:
@@ -106,7 +241,7 @@ def trigger_alert(
     
     if payload.event_type in {"theft", "violence", "manual_report"}:
         try:
-            alert = alert_service.create_and_send_alert(
+            alert = await alert_service.create_and_send_alert_async(
                 db,
                 camera_id=payload.camera_id,
                 event_type=payload.event_type,
@@ -125,70 +260,147 @@ def trigger_alert(
 async def detect(
     video: UploadFile = File(...), 
     camera_id: int = 1,
+    profile: Optional[str] = None,
 ):
-    video_bytes = await video.read()
-
     try:
-        # Frames are extracted as (T, H, W, C) numpy array of uint8 [0-255]
-        frames, duration = extract_frames(
-            video_bytes,
-            num_frames=16,
+        if not model_manager.ready:
+            raise ModelNotReadyError(model_manager.state, model_manager.retry_after_s)
+        inference_profile = profile_router.resolve(camera_id, profile)
+
+        clip = await open_clip_upload(
+            video,
+            max_bytes=config.MAX_UPLOAD_BYTES,
+            probe_bytes=config.UPLOAD_PROBE_BYTES,
             min_duration_s=5.0,
             max_duration_s=10.0,
+            backend=config.DECODE_BACKEND,
+        )
+
+        # Retried uploads of the same clip are answered from the cache without taking a slot
+        cache_key = None
+        if result_cache is not None:
+            cache_key = await asyncio.to_thread(
+                clip_cache_key,
+                clip,
+                num_frames=inference_profile.num_frames,
+                size=inference_profile.size,
+                min_duration_s=5.0,
+                max_duration_s=10.0,
+                strategy=config.DECODE_STRATEGY,
+                model_version=model_manager.version,
+                cascade_threshold=cascade.threshold if cascade is not None else None,
+                motion_threshold=config.MOTION_THRESHOLD,
+            )
+            cached = await result_cache.get_async(cache_key)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        async with inference_executor.slot():
+            started = time.perf_counter()
+            if inference_executor.kind == "process":
+                # File objects don't cross process boundaries
+                clip = clip.read()
+            # Frames are decoded, then normalized to (1, C, T, size, size), off the event loop
+            frames, duration, decode_stats = await decode_stage.submit((clip, inference_profile))
+            clip_tensor, decode_stats["motion_score"] = await preprocess_stage.submit(frames)
+
+            inference_start = time.perf_counter()
+            motion_gated = motion_gate.skip(decode_stats["motion_score"])
+            if not motion_gated:
+                predicted_label, alert_event_type, _, model_version = await classify(clip_tensor)
+            inference_end = time.perf_counter()
+            profile_router.record(inference_profile, inference_end - started)
+    except (InferenceBusyError, ModelNotReadyError) as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after_s)},
         )
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
-    frames = torch.tensor(frames, dtype=torch.float32)
-    
-    # 1. Scale to [0, 1] and Permute to (T, C, H, W)
-    frames = frames.permute(0, 3, 1, 2) / 255.0 
-    
-    # 2. Reshape to (1, C, T, H, W) for 3D model input
-    frames = frames.unsqueeze(0) # (1, T, C, H, W)
-    frames = frames.permute(0, 2, 1, 3, 4) # (1, C, T, H, W)
-    
-    # 3. Interpolate/Resize (kept for compatibility with original code's resize expectation)
-    _, C, T, H, W = frames.shape
-    frames = torch.nn.functional.interpolate(
-        frames,
-        size=(T, 224, 224),
-        mode="trilinear",
-        align_corners=False,
-    )
-    mean_tensor = torch.tensor(NORM_MEAN).reshape(1, 3, 1, 1, 1).to(frames.device)
-    std_tensor = torch.tensor(NORM_STD).reshape(1, 3, 1, 1, 1).to(frames.device)
-    
-    frames = (frames - mean_tensor) / std_tensor
-
-    frames = frames.to(device)
-
-    inference_start = time.perf_counter()
-    with torch.no_grad():
-        if device == "cuda":
-            torch.cuda.synchronize() 
-            with torch.amp.autocast(device_type="cuda"):
-                logits = model(frames)
-            torch.cuda.synchronize() 
-        else:
-            logits = model(frames)
-
-        probs = F.softmax(logits, dim=1)
-        conf, pred = torch.max(probs, dim=1)
-    inference_end = time.perf_counter()
     inference_time = inference_end - inference_start
-        
-    predicted_label = CLASSES[int(pred.item())]
+    if motion_gated:
+        # Static scene: the forward pass was skipped
+        predicted_label, alert_event_type, model_version = "normal", "normal", None
     
-    alert_event_type = PREDICTION_TO_ALERT_MAP.get(predicted_label, "normal")
-    
-    return {
+    result = {
         "prediction": predicted_label, 
         "alert_type": alert_event_type,
         "clip_duration_seconds": round(float(duration), 2),
         "inference_time_seconds": round(inference_time, 4),
+        "decode_strategy": decode_stats.get("strategy"),
+        "decode_time_seconds": round(decode_stats.get("decode_seconds", 0.0), 4),
+        "motion_score": round(decode_stats["motion_score"], 4),
+        "motion_gated": motion_gated,
+        "profile": inference_profile.name,
+        "model_version": model_version,
+        "cached": False,
     }
+    if result_cache is not None:
+        result_cache.put(cache_key, result)
+    return result
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def readiness_check(response: Response):
+    status = model_manager.status()
+    if not model_manager.ready:
+        response.status_code = 503
+        response.headers["Retry-After"] = str(model_manager.retry_after_s)
+    return status
+
+
+@app.get("/api/v1/model")
+def model_status():
+    return model_manager.status()
+
+
+@app.post("/api/v1/model/reload", status_code=202)
+def reload_model(payload: Optional[ModelReloadRequest] = None):
+    path = payload.path if payload is not None else None
+    if path is not None:
+        # Only files next to the one being served can be loaded
+        allowed = os.path.dirname(os.path.realpath(model_manager.source_path))
+        if os.path.dirname(os.path.realpath(path)) != allowed:
+            raise HTTPException(status_code=400, detail=f"Model files can only be loaded from {allowed}")
+        if not os.path.isfile(path):
+            raise HTTPException(status_code=400, detail=f"Model file not found: {path}")
+    try:
+        model_manager.start_reload(path)
+    except ModelNotReadyError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after_s)},
+        )
+    except ReloadInProgressError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return model_manager.status()
+
+
+@app.get("/api/v1/metrics")
+def metrics():
+    return {
+        "batching": batcher.stats(),
+        "executor": inference_executor.stats(),
+        "profiles": profile_router.stats(),
+        "pipeline": {
+            "decode": decode_stage.stats(),
+            "preprocess": preprocess_stage.stats(),
+        },
+        "decode": strategy_selector.stats(),
+        "model": model_manager.status(),
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+        "cascade": cascade.stats() if cascade is not None else None,
+        "motion": motion_gate.stats(),
+        "alerts": alert_service.stats(),
+        "lookup_cache": alert_service.lookup_cache.stats(),
+        "db_pool": pool_stats(),
+    }
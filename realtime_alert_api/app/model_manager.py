@@ -0,0 +1,336 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Any, Dict, Iterable, Tuple
+
+import torch
+
+from .backends import ARTIFACT_SUFFIXES, INFERENCE_BACKENDS, Runner, artifact_path_for, load_runner
+from .precision import resolve_precision
+
+logger = logging.getLogger(__name__)
+
+
+class ModelNotReadyError(RuntimeError):
+    def __init__(self, state: str, retry_after_s: int = 5):
+        super().__init__(f"Model is not ready yet (state: {state}).")
+        self.state = state
+        self.retry_after_s = retry_after_s
+
+
+class ReloadInProgressError(RuntimeError):
+    pass
+
+
+class ModelManager:
+    """
+    Own the ViolenceSwin3D instance: background loading, warmup and readiness.
+
+    Nothing is loaded at import time. ``start()`` schedules ``load()`` on the
+    given executor so the app can answer ``/health`` right away, and
+    ``/ready`` reports ``ready`` only once the checkpoint is loaded and the
+    warmup passes have run. The model is always built without the torchvision
+    Kinetics-400 download because the fine-tuned checkpoint overwrites it.
+
+    ``backend`` picks how the forward pass runs (see ``backends``): eager,
+    torch.compile, or a TorchScript / ONNX Runtime artifact exported from the
+    checkpoint and loaded from ``artifact_path``. Warmup runs once per clip
+    shape in ``input_shapes`` ((frames, size) pairs, one per inference
+    profile), so every profile's graph is compiled before ``/ready``. On CPU,
+    ``precision`` can be "int8" (dynamically quantized Linear layers) or
+    "bf16" (autocast, falling back to fp32 on CPUs without bf16 support).
+
+    ``start_reload()`` hot-swaps the weights without downtime: the new file is
+    loaded, warmed up and checked on ``canary`` in a background thread while
+    the current model keeps serving, then swapped in with a single reference
+    assignment. Batches already running finish on the old model, and
+    ``forward()`` returns the version that produced each batch's logits.
+    """
+
+    def __init__(
+        self,
+        *,
+        checkpoint_path: str,
+        num_classes: int,
+        device: str = "cpu",
+        input_shapes: Iterable[Tuple[int, int]] = ((16, 224),),
+        warmup_runs: int = 1,
+        retry_after_s: int = 5,
+        backend: str = "eager",
+        artifact_path: str | None = None,
+        precision: str = "fp32",
+    ):
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend {backend!r}; choose from {INFERENCE_BACKENDS}")
+        self.checkpoint_path = checkpoint_path
+        self.num_classes = num_classes
+        self.device = device
+        self.input_shapes = sorted(set(input_shapes))
+        self.warmup_runs = max(0, int(warmup_runs))
+        self.retry_after_s = retry_after_s
+        self.backend = backend
+        self.artifact_path = artifact_path
+        if backend in ARTIFACT_SUFFIXES and artifact_path is None:
+            self.artifact_path = artifact_path_for(checkpoint_path, backend)
+        if backend in ARTIFACT_SUFFIXES and self.input_shapes != [(16, 224)]:
+            raise ValueError(
+                f"{backend} artifacts are exported for 16x224 clips; profiles with other shapes need "
+                "the eager or compile backend"
+            )
+        if device == "cpu":
+            self.precision = resolve_precision(precision)
+        else:
+            if precision != "fp32":
+                logger.warning("MODEL_PRECISION=%s only applies on CPU; %s uses fp16 autocast", precision, device)
+            self.precision = "fp32"
+
+        self.state = "not_loaded"
+        self.error: str | None = None
+        self.load_seconds: float | None = None
+        self.warmup_seconds: float | None = None
+        # Identifies the loaded weights, e.g. for cache keys
+        self.version: str | None = None
+        # (runner, version), replaced as a whole so a batch never mixes the two
+        self._active: Tuple[Runner, str] | None = None
+
+        # Preprocessed clip the replacement model must classify sanely before a swap
+        self.canary: torch.Tensor | None = None
+        self._reload_lock = threading.Lock()
+        self.reload_state = "idle"
+        self.reload_error: str | None = None
+        self.reloads = 0
+        self.previous_version: str | None = None
+        self.swapped_at: float | None = None
+        self.last_canary: Dict[str, Any] | None = None
+        self._rejected_version: str | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    @property
+    def model(self) -> Runner:
+        if self._active is None or not self.ready:
+            raise ModelNotReadyError(self.state, self.retry_after_s)
+        return self._active[0]
+
+    def start(self, executor: Executor) -> None:
+        if self.state in {"loading", "ready"}:
+            return
+        self.state = "loading"
+        executor.submit(self._load_safely)
+
+    def _load_safely(self) -> None:
+        try:
+            self.load()
+        except Exception as exc:
+            logger.exception("Failed to load %s model from %s", self.backend, self.source_path)
+            self.state = "failed"
+            self.error = str(exc)
+
+    @property
+    def source_path(self) -> str:
+        """The file the backend loads: the exported artifact, or the checkpoint itself."""
+        return self.artifact_path if self.backend in ARTIFACT_SUFFIXES else self.checkpoint_path
+
+    def load(self) -> None:
+        self.state = "loading"
+        self.error = None
+
+        model, version, load_s, warmup_s = self._build(self.checkpoint_path, self.artifact_path)
+        self._active = (model, version)
+        self.version = version
+        self.load_seconds, self.warmup_seconds = load_s, warmup_s
+        self.state = "ready"
+        logger.info(
+            "Model ready (%s backend, %s, load %.2fs, warmup %.2fs over %d runs per shape)",
+            self.backend,
+            self.precision,
+            self.load_seconds,
+            self.warmup_seconds,
+            self.warmup_runs,
+        )
+
+    def _build(self, checkpoint_path: str, artifact_path: str | None) -> Tuple[Runner, str, float, float]:
+        """Load and warm up a model; returns it with its version and load/warmup seconds."""
+        source = artifact_path if self.backend in ARTIFACT_SUFFIXES else checkpoint_path
+        version = self._file_version(source)
+        if version is None:
+            raise FileNotFoundError(f"Checkpoint not found: {source}")
+
+        started = time.perf_counter()
+        model = load_runner(
+            self.backend,
+            checkpoint_path=checkpoint_path,
+            num_classes=self.num_classes,
+            device=self.device,
+            artifact_path=artifact_path,
+            precision=self.precision,
+        )
+        load_s = time.perf_counter() - started
+
+        # torch.compile compiles on the first warmup pass
+        started = time.perf_counter()
+        for num_frames, size in self.input_shapes:
+            dummy = torch.zeros(1, 3, num_frames, size, size)
+            for _ in range(self.warmup_runs):
+                self._run(model, dummy)
+        warmup_s = time.perf_counter() - started
+        return model, version, load_s, warmup_s
+
+    def start_reload(self, path: str | None = None) -> None:
+        """
+        Hot-swap to ``path`` (a checkpoint, or an artifact for the torchscript
+        and onnx backends; default: the current file, e.g. overwritten in
+        place) in a background thread. Progress is under ``reload`` in
+        ``status()``.
+        """
+        if not self.ready:
+            raise ModelNotReadyError(self.state, self.retry_after_s)
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgressError("A model reload is already in progress")
+        self.reload_state = "loading"
+        self.reload_error = None
+        threading.Thread(target=self._reload, args=(path,), name="model-reload", daemon=True).start()
+
+    def _reload(self, path: str | None) -> None:
+        checkpoint_path, artifact_path = self.checkpoint_path, self.artifact_path
+        if path is not None and self.backend in ARTIFACT_SUFFIXES:
+            artifact_path = path
+        elif path is not None:
+            checkpoint_path = path
+        source = artifact_path if self.backend in ARTIFACT_SUFFIXES else checkpoint_path
+        try:
+            model, version, load_s, warmup_s = self._build(checkpoint_path, artifact_path)
+            self.reload_state = "validating"
+            self.last_canary = self._validate(model)
+
+            previous = self._active
+            self._active = (model, version)
+            self.version = version
+            self.checkpoint_path, self.artifact_path = checkpoint_path, artifact_path
+            self.load_seconds, self.warmup_seconds = load_s, warmup_s
+            self.previous_version = previous[1] if previous is not None else None
+            self.swapped_at = time.time()
+            self.reloads += 1
+            self.reload_state = "swapped"
+            logger.info("Swapped model %s -> %s", self.previous_version, version)
+        except Exception as exc:
+            logger.exception("Model reload failed; still serving %s", self.version)
+            self.reload_state = "failed"
+            self.reload_error = str(exc)
+            self._rejected_version = self._file_version(source)
+        finally:
+            self._reload_lock.release()
+
+    def _validate(self, model: Runner) -> Dict[str, Any]:
+        """
+        Run the canary clip (a fixed random clip if none is set) through the
+        new model. Wrong shapes or non-finite logits reject it; a different
+        prediction than the current model's is only reported.
+        """
+        canary = self.canary
+        if canary is None:
+            num_frames, size = self.input_shapes[-1]
+            canary = torch.randn(1, 3, num_frames, size, size, generator=torch.Generator().manual_seed(0))
+        logits = self._run(model, canary)
+        if tuple(logits.shape) != (canary.shape[0], self.num_classes):
+            raise ValueError(
+                f"Canary logits have shape {tuple(logits.shape)}, expected ({canary.shape[0]}, {self.num_classes})"
+            )
+        if not torch.isfinite(logits).all():
+            raise ValueError("Canary logits are not finite")
+
+        probs = torch.softmax(logits, dim=1)[0]
+        result = {
+            "clip": "configured" if self.canary is not None else "synthetic",
+            "prediction": int(probs.argmax()),
+            "confidence": round(float(probs.max()), 4),
+        }
+        current = self._active
+        if current is not None:
+            result["agrees_with_previous"] = bool(self._run(current[0], canary).argmax(dim=1)[0] == probs.argmax())
+        return result
+
+    async def watch(self, interval_s: float) -> None:
+        """
+        Reload whenever the model file on disk no longer matches the serving
+        version. A change is acted on once the file has looked the same for one
+        interval, so a copy in progress is not loaded half-written; a file that
+        failed to load is not retried until it changes again.
+        """
+        pending = None
+        while True:
+            await asyncio.sleep(interval_s)
+            version = self._file_version(self.source_path)
+            if (
+                not self.ready
+                or version is None
+                or version in {self.version, self._rejected_version}
+                or self._reload_lock.locked()
+            ):
+                pending = None
+                continue
+            if version != pending:
+                pending = version
+                continue
+            pending = None
+            logger.info("Model file %s changed, reloading", self.source_path)
+            try:
+                self.start_reload()
+            except ReloadInProgressError:
+                pass
+
+    def _file_version(self, path: str) -> str | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        version = f"{os.path.basename(path)}@{int(stat.st_mtime)}-{stat.st_size:x}"
+        if self.precision != "fp32":
+            version += f"+{self.precision}"
+        return version
+
+    def _run(self, model: Runner, clips: torch.Tensor) -> torch.Tensor:
+        clips = clips.to(self.device)
+        with torch.no_grad():
+            if self.device == "cuda":
+                with torch.amp.autocast(device_type="cuda"):
+                    logits = model(clips)
+            else:
+                logits = model(clips)
+        return logits.float().cpu()
+
+    def forward(self, clips: torch.Tensor) -> Tuple[torch.Tensor, str]:
+        """Logits for a batch and the version of the weights that produced them."""
+        active = self._active
+        if active is None or not self.ready:
+            raise ModelNotReadyError(self.state, self.retry_after_s)
+        model, version = active
+        return self._run(model, clips), version
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "device": self.device,
+            "backend": self.backend,
+            "precision": self.precision,
+            "checkpoint": os.path.basename(self.source_path),
+            "version": self.version,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "warmup_runs": self.warmup_runs,
+            "warmup_shapes": [f"{num_frames}x{size}" for num_frames, size in self.input_shapes],
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "reload": {
+                "state": self.reload_state,
+                "error": self.reload_error,
+                "reloads": self.reloads,
+                "previous_version": self.previous_version,
+                "swapped_at": self.swapped_at,
+                "canary": self.last_canary,
+            },
+        }
@@ -5,6 +5,7 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     REAL,
@@ -40,6 +41,12 @@ class Camera(Base):
 
 class Alert(Base):
     __tablename__ = "Alerts"  # Match PostgreSQL table name exactly
+    # Alert history paging on (timestamp, alert_id); same indexes as backend/src/models.py
+    __table_args__ = (
+        Index("ix_alerts_timestamp_id", "timestamp", "alert_id"),
+        Index("ix_alerts_camera_timestamp_id", "camera_id", "timestamp", "alert_id"),
+        Index("ix_alerts_status_timestamp_id", "status", "timestamp", "alert_id"),
+    )
 
     alert_id = Column(Integer, primary_key=True, index=True)
     camera_id = Column(Integer, ForeignKey("Cameras.camera_id", ondelete="CASCADE"), nullable=False)
@@ -64,6 +71,7 @@ class Alert(Base):
 
 class EventMedia(Base):
     __tablename__ = "EventMedia"  # Match PostgreSQL table name exactly
+    __table_args__ = (Index("ix_event_media_alert_id", "alert_id"),)
 
     media_id = Column(Integer, primary_key=True, index=True)
     alert_id = Column(Integer, ForeignKey("Alerts.alert_id", ondelete="CASCADE"), nullable=False)
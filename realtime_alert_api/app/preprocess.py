@@ -0,0 +1,76 @@
+import numpy as np
+import torch
+
+from .extract_frames import extract_frames
+from .motion import motion_score
+
+NORM_MEAN = np.array([0.485, 0.456, 0.406]).astype(np.float32)
+NORM_STD = np.array([0.229, 0.224, 0.225]).astype(np.float32)
+
+INPUT_SIZE = 224
+
+# (x / 255 - mean) / std folded into a single multiply-subtract on uint8 values
+_SCALE = torch.from_numpy(1.0 / (255.0 * NORM_STD)).reshape(1, 3, 1, 1, 1)
+_SHIFT = torch.from_numpy(NORM_MEAN / NORM_STD).reshape(1, 3, 1, 1, 1)
+
+
+def frames_to_tensor(frames: np.ndarray) -> torch.Tensor:
+    """
+    Turn ``(T, H, W, C)`` uint8 RGB frames into a normalized ``(1, C, T, H, W)`` tensor.
+
+    The float32 buffer is allocated once and normalized in place.
+    """
+    T, H, W, C = frames.shape
+    clip = torch.empty((1, C, T, H, W), dtype=torch.float32)
+    clip[0].copy_(torch.from_numpy(np.ascontiguousarray(frames)).permute(3, 0, 1, 2))
+    clip.mul_(_SCALE).sub_(_SHIFT)
+    return clip
+
+
+def decode_clip(
+    video_bytes,
+    num_frames: int = 16,
+    min_duration_s: float = 5.0,
+    max_duration_s: float = 10.0,
+    size: int = INPUT_SIZE,
+    strategy: str = "auto",
+    backend: str = "auto",
+):
+    """
+    Decode stage: sample ``(T, size, size, 3)`` uint8 frames from a clip.
+
+    Frames are downscaled to ``size`` as they are decoded, so the
+    full-resolution clip never exists as float32. Kept free of model state so
+    it can run in a worker thread or process. Returns the frames, the clip
+    duration and the decode stats from ``extract_frames``.
+    """
+    decode_stats: dict = {}
+    frames, duration = extract_frames(
+        video_bytes,
+        num_frames=num_frames,
+        min_duration_s=min_duration_s,
+        max_duration_s=max_duration_s,
+        size=(size, size),
+        strategy=strategy,
+        stats=decode_stats,
+        backend=backend,
+    )
+    return frames, duration, decode_stats
+
+
+def preprocess_frames(frames: np.ndarray):
+    """
+    Preprocess stage: the clip's ``motion_score``, taken from the uint8 frames,
+    and the normalized ``(1, C, T, H, W)`` model input.
+    """
+    return frames_to_tensor(frames), motion_score(frames)
+
+
+def prepare_clip(video_bytes, **decode_kwargs):
+    """
+    Decode and preprocess a clip in one call. Returns the tensor, the clip
+    duration and the decode stats plus ``motion_score``.
+    """
+    frames, duration, decode_stats = decode_clip(video_bytes, **decode_kwargs)
+    clip, decode_stats["motion_score"] = preprocess_frames(frames)
+    return clip, duration, decode_stats
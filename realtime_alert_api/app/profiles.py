@@ -0,0 +1,109 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+
+@dataclass(frozen=True)
+class InferenceProfile:
+    name: str
+    num_frames: int
+    size: int
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.num_frames, self.size
+
+
+def parse_profiles(spec: str) -> Dict[str, InferenceProfile]:
+    """Parse ``"fast=8x160,accurate=16x224"`` into profiles (frames x square input size)."""
+    profiles: Dict[str, InferenceProfile] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, shape = item.partition("=")
+        frames, _, size = shape.strip().lower().partition("x")
+        try:
+            profile = InferenceProfile(name=name.strip(), num_frames=int(frames), size=int(size))
+        except ValueError:
+            raise ValueError(f"Invalid inference profile {item.strip()!r}, expected name=FRAMESxSIZE") from None
+        if not profile.name or profile.num_frames < 1 or profile.size < 32:
+            raise ValueError(f"Invalid inference profile {item.strip()!r}, expected name=FRAMESxSIZE")
+        profiles[profile.name] = profile
+    return profiles
+
+
+def parse_camera_profiles(spec: str) -> Dict[int, str]:
+    """Parse ``"3=fast,12=accurate"`` into camera_id -> profile name."""
+    cameras: Dict[int, str] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        camera_id, _, name = item.partition("=")
+        try:
+            cameras[int(camera_id)] = name.strip()
+        except ValueError:
+            raise ValueError(f"Invalid camera profile {item.strip()!r}, expected CAMERA_ID=PROFILE") from None
+    return cameras
+
+
+class ProfileRouter:
+    """
+    Pick the inference profile for a clip: the one named in the request, else
+    the camera's assigned profile, else ``default``. Counts requests and
+    latency (decode through model) per profile for ``/metrics``.
+    """
+
+    def __init__(self, profiles: Dict[str, InferenceProfile], *, default: str, cameras: Dict[int, str] | None = None):
+        if default not in profiles:
+            raise ValueError(f"Default inference profile {default!r} is not one of {sorted(profiles)}")
+        cameras = cameras or {}
+        unknown = {name for name in cameras.values() if name not in profiles}
+        if unknown:
+            raise ValueError(f"Cameras assigned to unknown inference profiles: {sorted(unknown)}")
+        self.profiles = profiles
+        self.default = default
+        self.cameras = cameras
+        self._lock = threading.Lock()
+        self._requests = {name: 0 for name in profiles}
+        self._latency_s = {name: 0.0 for name in profiles}
+
+    @property
+    def shapes(self) -> List[Tuple[int, int]]:
+        return sorted({profile.shape for profile in self.profiles.values()})
+
+    def camera_profile(self, camera_id: int) -> InferenceProfile | None:
+        """The profile explicitly assigned to a camera, if any."""
+        name = self.cameras.get(camera_id)
+        return self.profiles[name] if name is not None else None
+
+    def resolve(self, camera_id: int | None, requested: str | None = None) -> InferenceProfile:
+        if requested:
+            if requested not in self.profiles:
+                raise ValueError(f"Unknown inference profile {requested!r}; choose from {sorted(self.profiles)}")
+            return self.profiles[requested]
+        return self.camera_profile(camera_id) or self.profiles[self.default]
+
+    def record(self, profile: InferenceProfile, latency_s: float) -> None:
+        with self._lock:
+            self._requests[profile.name] += 1
+            self._latency_s[profile.name] += latency_s
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "default": self.default,
+                "profiles": {
+                    name: {
+                        "num_frames": profile.num_frames,
+                        "size": profile.size,
+                        "cameras": sorted(c for c, assigned in self.cameras.items() if assigned == name),
+                        "requests": self._requests[name],
+                        "avg_latency_ms": (
+                            round(self._latency_s[name] / self._requests[name] * 1000.0, 3)
+                            if self._requests[name]
+                            else 0.0
+                        ),
+                    }
+                    for name, profile in self.profiles.items()
+                },
+            }
@@ -4,9 +4,10 @@ from torchvision.models.video import swin3d_t, Swin3D_T_Weights
 
 
 class ViolenceSwin3D(nn.Module):
-    def __init__(self, num_classes: int = 6): 
+    def __init__(self, num_classes: int = 6, pretrained: bool = True): 
         super().__init__()
-        weights = Swin3D_T_Weights.KINETICS400_V1
+        # Skip the Kinetics-400 download when a fine-tuned checkpoint is loaded on top
+        weights = Swin3D_T_Weights.KINETICS400_V1 if pretrained else None
         model = swin3d_t(weights=weights)
 
         in_features = model.head.in_features
@@ -0,0 +1,166 @@
+import asyncio
+import json
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile
+
+from .extract_frames import check_duration, probe_duration
+
+CHUNK_SIZE = 256 * 1024
+
+# Leading bytes of the containers we accept; MP4/MOV/3GP carry an ISO box
+# type at offset 4 instead of a fixed magic number.
+_MAGIC_PREFIXES = {
+    b"\x1a\x45\xdf\xa3": "matroska",
+    b"RIFF": "avi",
+    b"FLV": "flv",
+    b"\x00\x00\x01\xba": "mpeg-ps",
+}
+_ISO_BOX_TYPES = {b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip"}
+# MPEG-TS has no magic number; every 188-byte packet starts with this sync byte
+_TS_PACKET_SIZE = 188
+_TS_SYNC_BYTE = 0x47
+
+# Containers whose header states the duration. For the others (MPEG-TS/PS)
+# the demuxer estimates it from the bytes it has, so a prefix of the upload
+# reads as a shorter clip and the range is only checked on the full file.
+_HEADER_DURATION_CONTAINERS = {"mp4", "matroska"}
+
+
+class UploadTooLargeError(ValueError):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Clip exceeds the upload limit of {max_bytes / (1024 * 1024):.1f} MiB.")
+        self.max_bytes = max_bytes
+
+
+def sniff_container(head: bytes) -> str | None:
+    if len(head) >= 8 and head[4:8] in _ISO_BOX_TYPES:
+        return "mp4"
+    for magic, name in _MAGIC_PREFIXES.items():
+        if head.startswith(magic):
+            return name
+    if _is_mpeg_ts(head):
+        return "mpeg-ts"
+    return None
+
+
+def _is_mpeg_ts(head: bytes) -> bool:
+    """Sync byte at the start of the first two packets, and the third when the head reaches it."""
+    if len(head) <= _TS_PACKET_SIZE:
+        return False
+    offsets = range(0, min(len(head), 3 * _TS_PACKET_SIZE), _TS_PACKET_SIZE)
+    return all(head[offset] == _TS_SYNC_BYTE for offset in offsets)
+
+
+async def open_clip_upload(
+    video: UploadFile,
+    *,
+    max_bytes: int,
+    probe_bytes: int,
+    min_duration_s: float,
+    max_duration_s: float,
+    backend: str = "auto",
+) -> BinaryIO:
+    """
+    Validate an uploaded clip from its first bytes and return a file to decode.
+
+    The declared size is checked before anything is read, then only the first
+    ``probe_bytes`` are read to check the container signature and, for
+    containers whose header states it (MP4 with ``moov`` at the front,
+    Matroska), the clip duration; other clips have their duration checked
+    when the whole file is decoded. When the size is
+    not declared the rest is streamed in chunks to enforce ``max_bytes``. The
+    returned object is the upload's own spooled file, rewound, so the clip is
+    never copied into a single in-memory bytes object.
+    """
+    if video.size is not None and video.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    await video.seek(0)
+    head = await video.read(probe_bytes)
+    container = sniff_container(head)
+    if container is None:
+        raise ValueError("Invalid clip: unsupported or unrecognised video container.")
+
+    if container in _HEADER_DURATION_CONTAINERS:
+        duration = await asyncio.to_thread(probe_duration, head, backend=backend)
+        if duration is not None:
+            check_duration(duration, min_duration_s, max_duration_s)
+
+    if video.size is None:
+        received = len(head)
+        while chunk := await video.read(CHUNK_SIZE):
+            received += len(chunk)
+            if received > max_bytes:
+                raise UploadTooLargeError(max_bytes)
+
+    await video.seek(0)
+    return video.file
+
+
+class UploadLimitMiddleware:
+    """
+    Reject oversized request bodies on the given paths while they stream in.
+
+    A declared ``Content-Length`` above the limit is refused before any body is
+    read; otherwise bytes are counted as they arrive and the request is cut off
+    with 413 as soon as the limit is crossed, so the multipart parser never
+    spools more than ``max_bytes``.
+    """
+
+    def __init__(self, app, *, max_bytes: int, path_suffixes: tuple[str, ...] = ("/detect",)):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_suffixes = path_suffixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].endswith(self.path_suffixes):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # HTTPException so FastAPI's body parsing re-raises it as-is
+                    raise HTTPException(status_code=413, detail=str(UploadTooLargeError(self.max_bytes)))
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as exc:
+            if exc.status_code != 413 or response_started:
+                raise
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": str(UploadTooLargeError(self.max_bytes))}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})